@@ -0,0 +1,242 @@
+import hmac
+import json
+import os
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import perf
+from client_auth import ClientAuth
+from importer import validate_record
+from storage import ENTRY_FRAME_COLUMNS
+
+API_HOST = os.environ.get("TIME_TRACKER_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("TIME_TRACKER_API_PORT", 8502))
+# Bearer token with firm-wide access, for practice-management integrations; unset means client tokens only
+API_KEY = os.environ.get("TIME_TRACKER_API_KEY")
+MAX_BODY_BYTES = 16 * 2**20
+MAX_BATCH_ENTRIES = 10_000
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _date_param(query, name):
+    value = query.get(name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be a YYYY-MM-DD date")
+
+def _list_param(query, name, default=()):
+    value = query.get(name)
+    return tuple(item for item in value.split(',') if item) if value is not None else tuple(default)
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """JSON endpoints over the server's DataManager; see ApiServer"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "TimeTrackerAPI/1.0"
+    # Headers and body are separate writes; with Nagle on, each kept-alive response waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch({
+            '/health': self._health,
+            '/clients': self._clients,
+            '/matters': self._matters,
+            '/report': self._report,
+            '/entries': self._entries,
+        })
+
+    def do_POST(self):
+        self._dispatch({
+            '/login': self._login,
+            '/entries': self._submit_entries,
+        })
+
+    def log_message(self, format, *args):
+        # One line per request would cost more than most requests; errors are logged as events
+        pass
+
+    def _dispatch(self, routes):
+        url = urlsplit(self.path)
+        self.query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            # Read up front, so a rejected request never leaves its body on a kept-alive connection
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # The body's end is unknown, so the connection cannot be reused
+                self.close_connection = True
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length must be a non-negative integer")
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True
+                raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Request body over {MAX_BODY_BYTES} bytes")
+            self.body = self.rfile.read(length) if length else b''
+            route = routes.get(url.path)
+            if route is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"No {self.command} {url.path}")
+            route()
+        except ApiError as e:
+            self._send_json({'error': str(e)}, e.status)
+        except Exception as e:
+            perf.log_event("api.failed", method=self.command, path=url.path, error=str(e))
+            self._send_json({'error': "Internal error"}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def _send_json(self, payload, status=HTTPStatus.OK):
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+
+    def _caller(self):
+        """The client a bearer token is scoped to, or None for the firm API key"""
+        header = self.headers.get("Authorization", "")
+        token = header[len("Bearer "):] if header.startswith("Bearer ") else None
+        if not token:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Missing bearer token")
+        if self.server.api_key and hmac.compare_digest(token, self.server.api_key):
+            return None
+        client = self.server.auth.verify_token(token)
+        if client is None:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Invalid or expired token")
+        return client
+
+    def _scoped_client(self):
+        """The client a request is about: the query's, limited to the caller's own for client tokens"""
+        caller, client = self._caller(), self.query.get('client')
+        if caller is not None and client not in (None, caller):
+            raise ApiError(HTTPStatus.FORBIDDEN, "Clients can only read their own entries")
+        return caller if caller is not None else client
+
+    def _health(self):
+        self._send_json({'status': 'ok'})
+
+    def _login(self):
+        body = self._read_json()
+        if not isinstance(body, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Expected {\"username\": ..., \"password\": ...}")
+        username, password = str(body.get('username', '')), str(body.get('password', ''))
+        success, client = self.server.auth.authenticate_client(username, password)
+        if not success:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Invalid username or password")
+        self._send_json({'client': client, 'token': self.server.auth.issue_token(username)})
+
+    def _clients(self):
+        caller = self._caller()
+        self._send_json({'clients': self.server.data_manager.get_clients() if caller is None else [caller]})
+
+    def _matters(self):
+        client = self._scoped_client()
+        if client is None:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "client is required")
+        self._send_json({'client': client, 'matters': self.server.data_manager.get_matters(client)})
+
+    def _report(self):
+        client = self._scoped_client()
+        start_date, end_date = _date_param(self.query, 'start'), _date_param(self.query, 'end')
+        try:
+            report = self.server.data_manager.get_report(
+                start_date, end_date, _list_param(self.query, 'dimensions'),
+                _list_param(self.query, 'measures', ('hours', 'entries')), client_name=client
+            )
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+        self._send_json(f'{{"rows": {report.to_json(orient="records")}}}')
+
+    def _entries(self):
+        """Stream matching entries as newline-delimited JSON, one storage chunk at a time"""
+        client = self._scoped_client()
+        start_date, end_date = _date_param(self.query, 'start'), _date_param(self.query, 'end')
+        chunks = self.server.data_manager.iter_entries(start_date, end_date, client)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                data = chunk[ENTRY_FRAME_COLUMNS].to_json(orient='records', lines=True).encode()
+                if not data.endswith(b'\n'):
+                    data += b'\n'
+                self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data))
+        except Exception as e:
+            # Too late for an error response; dropping the connection without the last chunk tells the client
+            perf.log_event("api.stream_failed", path=self.path, error=str(e))
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _submit_entries(self):
+        """Validate a batch of entries and write the valid ones; invalid ones are reported by index"""
+        caller = self._caller()
+        body = self._read_json()
+        records = body.get('entries') if isinstance(body, dict) else body
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Expected a list of entries or {\"entries\": [...]}")
+        if len(records) > MAX_BATCH_ENTRIES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {MAX_BATCH_ENTRIES} entries per request")
+
+        # Per record: requests are small and many, so frames would cost more than the checks
+        data_manager = self.server.data_manager
+        matters, valid, errors = {}, [], []
+        for index, record in enumerate(records):
+            entry, error = validate_record(record)
+            if entry is not None:
+                # Entries go only to existing matters, and a client token only to its own client
+                if entry['client'] not in matters:
+                    matters[entry['client']] = set(data_manager.get_matters(entry['client']))
+                if entry['matter'] not in matters[entry['client']]:
+                    error = "unknown client/matter"
+                elif caller is not None and entry['client'] != caller:
+                    error = "not this client's entry"
+            if error:
+                errors.append({'index': index, 'error': error})
+            else:
+                valid.append(entry)
+        if valid:
+            # Group-committed with every other request's entries; returns once they are durable
+            data_manager.add_time_entries(valid)
+        self._send_json({'accepted': len(valid), 'rejected': errors})
+
+class ApiServer(ThreadingHTTPServer):
+    """HTTP API over a DataManager, one thread per connection, for integrations and timer apps
+
+    GET /health, /clients, /matters?client=, /report?start=&end=&client=&dimensions=&measures=
+    and /entries?start=&end=&client= (streamed as NDJSON); POST /login and /entries.
+    Requests carry `Authorization: Bearer <token>`, a ClientAuth session token from /login,
+    scoped to that client, or the firm-wide TIME_TRACKER_API_KEY.
+    """
+
+    daemon_threads = True
+    # Bursts of connections from load balancers and benchmarks shouldn't be refused
+    request_queue_size = 1024
+
+    def __init__(self, data_manager, address=(API_HOST, API_PORT), auth=None, api_key=API_KEY):
+        self.data_manager = data_manager
+        self.auth = auth or ClientAuth(data_manager.storage)
+        self.api_key = api_key
+        super().__init__(address, ApiHandler)
+
+def serve(data_manager, host=API_HOST, port=API_PORT, api_key=API_KEY):
+    """Run the API until interrupted"""
+    with ApiServer(data_manager, (host, port), api_key=api_key) as server:
+        perf.log_event("api.started", host=host, port=server.server_address[1], firm_key=bool(api_key))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,257 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from data_manager import DataManager
+from storage import CsvStorage, ParquetStorage, SqliteStorage
+
+GENERATE_CHUNK_ROWS = 250_000
+# Generated entries end here so the same seed always gives the same dataset
+ANCHOR_DATE = date(2024, 12, 31)
+
+MATTER_TYPES = [
+    "General Advice", "Litigation", "Contract Review", "Employment", "Real Estate",
+    "Regulatory", "Due Diligence", "Financing", "IP Licensing", "Restructuring",
+]
+NARRATIVE_VERBS = [
+    "Review", "Draft", "Revise", "Prepare", "Analyze", "Research", "Attend", "Correspond regarding",
+    "Telephone conference regarding", "Finalize", "Negotiate", "Summarize", "Annotate", "File",
+]
+NARRATIVE_OBJECTS = [
+    "purchase agreement", "disclosure schedules", "board minutes", "discovery requests",
+    "deposition transcript", "motion to dismiss", "settlement terms", "closing checklist",
+    "employment agreement", "lease amendment", "regulatory filing", "opposing counsel's letter",
+    "client's comments", "expert report", "indemnification provisions", "due diligence findings",
+]
+NARRATIVE_FILLER = [
+    "with", "and", "for", "regarding", "including", "per", "client", "counsel", "issues", "follow-up",
+    "internal", "team", "comments", "next", "steps", "memo", "call", "email", "strategy", "open", "points",
+]
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def client_names(clients):
+    return [f"Client {i:04d}" for i in range(clients)]
+
+def matter_names(matters):
+    return [f"Matter {i:02d} - {MATTER_TYPES[i % len(MATTER_TYPES)]}" for i in range(matters)]
+
+def _narrative_pool(rng, size=5000):
+    """Build a pool of narratives whose word counts follow a long-tailed, realistic spread"""
+    # Mostly one-liners of 6-20 words, with the occasional paragraph-length entry
+    lengths = np.clip(rng.lognormal(mean=2.5, sigma=0.6, size=size), 3, 120).astype(int)
+    pool = []
+    for length in lengths:
+        words = [rng.choice(NARRATIVE_VERBS), rng.choice(NARRATIVE_OBJECTS)]
+        words += list(rng.choice(NARRATIVE_FILLER, size=max(length - 3, 0)))
+        pool.append(" ".join(words) + ".")
+    return np.array(pool, dtype=object)
+
+def generate_entries(rows, clients=50, matters=4, days=3 * 365, seed=0, chunk_rows=GENERATE_CHUNK_ROWS):
+    """Yield reproducible synthetic time entries as DataFrame chunks (with the minutes column)
+
+    Entries are spread over `days` days ending at ANCHOR_DATE, mostly on weekdays, across
+    `clients` clients with `matters` matters each. Client activity is skewed so a few
+    clients carry most of the hours, as in a real firm.
+    """
+    rng = np.random.default_rng(seed)
+    narratives = _narrative_pool(rng)
+    client_list = np.array(client_names(clients), dtype=object)
+    matter_list = np.array(matter_names(matters), dtype=object)
+
+    calendar = pd.date_range(end=ANCHOR_DATE, periods=days, freq="D")
+    day_weights = np.where(calendar.dayofweek < 5, 1.0, 0.1)
+    day_weights /= day_weights.sum()
+    day_strings = np.array(calendar.strftime("%Y-%m-%d"), dtype=object)
+
+    client_weights = 1 / np.arange(1, clients + 1)
+    client_weights /= client_weights.sum()
+
+    remaining = rows
+    while remaining > 0:
+        n = min(chunk_rows, remaining)
+        remaining -= n
+        # Billed in six-minute units, 0.1h to 8h
+        minutes = np.clip(rng.geometric(0.12, size=n), 1, 80) * 6
+        chunk = pd.DataFrame({
+            'date': day_strings[np.sort(rng.choice(days, size=n, p=day_weights))],
+            'client': client_list[rng.choice(clients, size=n, p=client_weights)],
+            'matter': matter_list[rng.integers(0, matters, size=n)],
+            'duration': [f"{m // 60}:{m % 60:02d}" for m in minutes.tolist()],
+            'narrative': narratives[rng.integers(0, len(narratives), size=n)],
+            'minutes': minutes,
+        })
+        yield chunk
+
+def build_storage(backend, root):
+    """Open an empty storage backend of the given kind under root"""
+    if backend == "sqlite":
+        return SqliteStorage(os.path.join(root, "time_tracker.db"))
+    if backend == "parquet":
+        return ParquetStorage(root)
+    return CsvStorage(root)
+
+def build_dataset(backend, root, rows, clients=50, matters=4, seed=0):
+    """Populate a fresh store under root with synthetic clients, matters and entries"""
+    data_manager = DataManager(build_storage(backend, root))
+    data_manager.add_matters([(client, matter) for client in client_names(clients) for matter in matter_names(matters)])
+    for chunk in generate_entries(rows, clients, matters, seed=seed):
+        data_manager.add_time_entries(chunk)
+    if backend == "parquet":
+        data_manager.storage.convert_partitions()
+    # Benchmarks start from a cold cache, as a freshly started app would
+    return DataManager(build_storage(backend, root))
+
+def _percentiles(samples):
+    ms = np.array(samples) * 1000
+    return {
+        'calls': len(ms),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+def measure(operation, repeat):
+    """Time a traced cold first call, then `repeat` untraced warm calls of operation(i)
+
+    The first call pays for parsing and cache fills, so its latency is reported on its own
+    and its peak traced allocation is the operation's peak memory.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    operation(0)
+    cold = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples = []
+    for i in range(1, repeat + 1):
+        start = time.perf_counter()
+        operation(i)
+        samples.append(time.perf_counter() - start)
+
+    result = _percentiles(samples)
+    result['cold_ms'] = round(cold * 1000, 3)
+    result['peak_memory_bytes'] = peak
+    return result
+
+def benchmark_cases(data_manager, clients, matters, seed=0):
+    """The operations measured, keyed by name; each takes the iteration number"""
+    rng = np.random.default_rng(seed + 1)
+    client_list = client_names(clients)
+    matter_list = matter_names(matters)
+    days = [ANCHOR_DATE - timedelta(days=int(d)) for d in rng.integers(0, 365, size=1000)]
+
+    from client_auth import ClientAuth
+    auth = ClientAuth(data_manager.storage)
+    auth.register_client(client_list[0], "benchmark", "benchmark-password")
+
+    def add_time_entry(i):
+        data_manager.add_time_entry({
+            'date': ANCHOR_DATE.strftime('%Y-%m-%d'),
+            'client': client_list[i % clients],
+            'matter': matter_list[i % matters],
+            'duration': '0:30',
+            'narrative': 'Benchmark entry',
+        })
+
+    def report_summaries(i):
+        # The report queries behind the default Reports page views
+        end = days[i % len(days)]
+        data_manager.get_report(end - timedelta(days=30), end)
+        data_manager.get_report(end - timedelta(days=30), end, ['client'], ['hours'])
+        data_manager.get_report(end - timedelta(days=30), end, ['week', 'client'], ['hours'])
+
+    return {
+        'get_daily_entries': lambda i: data_manager.get_daily_entries(days[i % len(days)]),
+        'get_report_data': lambda i: data_manager.get_report_data(days[i % len(days)] - timedelta(days=30), days[i % len(days)]),
+        'get_client_entries': lambda i: data_manager.get_client_entries(
+            client_list[i % clients], days[i % len(days)] - timedelta(days=90), days[i % len(days)]
+        ),
+        'get_matters': lambda i: data_manager.get_matters(client_list[i % clients]),
+        'render_reports_aggregations': report_summaries,
+        'authenticate_client': lambda i: auth.authenticate_client("benchmark", "benchmark-password"),
+        # Last, since it changes the data the reads above see
+        'add_time_entry': add_time_entry,
+    }
+
+def run_benchmarks(rows, backend="csv", clients=50, matters=4, repeat=50, seed=0, root=None):
+    """Build a dataset of `rows` entries and measure every benchmark case against it"""
+    with tempfile.TemporaryDirectory(prefix="time-tracker-bench-", dir=root) as workdir:
+        start = time.perf_counter()
+        data_manager = build_dataset(backend, workdir, rows, clients, matters, seed)
+        build_seconds = time.perf_counter() - start
+
+        results = {}
+        for name, operation in benchmark_cases(data_manager, clients, matters, seed).items():
+            results[name] = measure(operation, repeat)
+            print(f"{rows:>10} {backend:<8} {name:<28} p50 {results[name]['p50_ms']:>9.3f} ms  "
+                  f"p95 {results[name]['p95_ms']:>9.3f} ms  cold {results[name]['cold_ms']:>9.3f} ms  peak {results[name]['peak_memory_bytes'] / 2**20:>8.1f} MiB")
+
+    return {
+        'rows': rows,
+        'backend': backend,
+        'clients': clients,
+        'matters_per_client': matters,
+        'repeat': repeat,
+        'seed': seed,
+        'build_seconds': round(build_seconds, 3),
+        'results': results,
+    }
+
+def run_suite(sizes, backend="csv", clients=50, matters=4, repeat=50, seed=0, output=None, root=None):
+    """Run the benchmarks at each dataset size and write the results as JSON"""
+    report = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'runs': [run_benchmarks(rows, backend, clients, matters, repeat, seed, root) for rows in sizes],
+    }
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    report['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    output = output or f"benchmark-{report['commit'] or 'local'}-{backend}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+    return report
+
+def compare(baseline_path, current_path, metric='p50_ms'):
+    """Print the ratio of each benchmark's metric between two result files"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+
+    before = {(run['rows'], run['backend'], name): result[metric]
+              for run in baseline['runs'] for name, result in run['results'].items()}
+    print(f"{baseline.get('commit')} -> {current.get('commit')} ({metric})")
+    for run in current['runs']:
+        for name, result in run['results'].items():
+            key = (run['rows'], run['backend'], name)
+            if key not in before:
+                continue
+            ratio = result[metric] / before[key] if before[key] else float('inf')
+            print(f"{run['rows']:>10} {run['backend']:<8} {name:<28} {before[key]:>9.3f} -> {result[metric]:>9.3f}  x{ratio:.2f}")
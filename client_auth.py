@@ -1,62 +1,143 @@
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
-import pandas as pd
+import hmac
 import os
+import secrets
+import threading
+from storage import get_storage
+
+# scrypt cost parameters; raise CLIENT_AUTH_SCRYPT_N on faster hardware
+SCRYPT_N = int(os.environ.get("CLIENT_AUTH_SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.environ.get("CLIENT_AUTH_SCRYPT_R", 8))
+SCRYPT_P = int(os.environ.get("CLIENT_AUTH_SCRYPT_P", 1))
+
+# Password hashing runs here so a burst of logins queues instead of pinning every script thread
+HASH_WORKERS = int(os.environ.get("CLIENT_AUTH_WORKERS", 4))
+HASH_TIMEOUT_SECONDS = 30
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="client-auth")
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * 1024 * 1024)
+
+def hash_password(password):
+    """Hash a password with scrypt and a random salt, encoding the cost parameters"""
+    salt = secrets.token_bytes(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+
+def verify_password(password, stored_hash):
+    """Check a password against a stored hash; returns (matches, needs_rehash)"""
+    if stored_hash.startswith("scrypt$"):
+        _, n, r, p, salt, digest = stored_hash.split("$")
+        n, r, p = int(n), int(r), int(p)
+        candidate = _scrypt(password, bytes.fromhex(salt), n, r, p)
+        matches = hmac.compare_digest(candidate.hex(), digest)
+        return matches, matches and (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+    # Legacy unsalted SHA-256 hashes are upgraded on the next successful login
+    matches = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored_hash)
+    return matches, matches
+
+@st.cache_resource
+def get_client_auth():
+    """Share one ClientAuth (and its credential index) across every session in this process"""
+    return ClientAuth()
 
 class ClientAuth:
-    def __init__(self):
-        self.clients_auth_file = "client_auth.csv"
-        self._initialize_auth_file()
-    
-    def _initialize_auth_file(self):
-        """Initialize the client authentication file if it doesn't exist"""
-        if not os.path.exists(self.clients_auth_file):
-            pd.DataFrame(columns=[
-                'client_name', 'username', 'password_hash'
-            ]).to_csv(self.clients_auth_file, index=False)
-    
-    def _hash_password(self, password):
-        """Hash the password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
-    
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
+        # username -> (client_name, password_hash)
+        self._credentials = {}
+        self._version = None
+        self._lock = threading.RLock()
+        # Session tokens only need to outlive the process, like the sessions holding them
+        self._token_key = secrets.token_bytes(32)
+
+    def _ensure_index(self):
+        """Rebuild the username index if the credential store changed"""
+        version = self.storage.credentials_version()
+        if version == self._version:
+            return
+        with self._lock:
+            df = self.storage.read_credentials().dropna(subset=['username'])
+            self._credentials = {
+                str(row.username): (row.client_name, str(row.password_hash))
+                for row in df.itertuples(index=False)
+            }
+            self._version = version
+
+    def _save(self, client_name, username, password_hash):
+        """Write a credential row through to storage and the index"""
+        with self._lock:
+            before = self.storage.credentials_version()
+            self.storage.append_credentials([{
+                'client_name': client_name,
+                'username': username,
+                'password_hash': password_hash
+            }])
+            self._credentials[username] = (client_name, password_hash)
+            self._version = self.storage.credentials_version() if before == self._version else None
+
     def register_client(self, client_name, username, password):
         """Register a new client with login credentials"""
         try:
-            df = pd.read_csv(self.clients_auth_file)
-            
+            self._ensure_index()
+
             # Check if username already exists
-            if not df.empty and username in df['username'].values:
+            if username in self._credentials:
                 return False, "Username already exists"
-            
-            # Add new client credentials
-            new_client = {
-                'client_name': client_name,
-                'username': username,
-                'password_hash': self._hash_password(password)
-            }
-            
-            df = pd.concat([df, pd.DataFrame([new_client])], ignore_index=True)
-            df.to_csv(self.clients_auth_file, index=False)
+
+            password_hash = _hash_pool.submit(hash_password, password).result(timeout=HASH_TIMEOUT_SECONDS)
+            with self._lock:
+                if username in self._credentials:
+                    return False, "Username already exists"
+                self._save(client_name, username, password_hash)
             return True, "Client registered successfully"
-            
+
         except Exception as e:
             return False, f"Error registering client: {str(e)}"
-    
+
     def authenticate_client(self, username, password):
         """Authenticate a client's login credentials"""
         try:
-            df = pd.read_csv(self.clients_auth_file)
-            if df.empty:
+            self._ensure_index()
+            credentials = self._credentials.get(username)
+            if credentials is None:
                 return False, None
-            
-            client_row = df[df['username'] == username]
-            if client_row.empty:
+
+            client_name, stored_hash = credentials
+            matches, needs_rehash = _hash_pool.submit(
+                verify_password, password, stored_hash
+            ).result(timeout=HASH_TIMEOUT_SECONDS)
+            if not matches:
                 return False, None
-            
-            if client_row.iloc[0]['password_hash'] == self._hash_password(password):
-                return True, client_row.iloc[0]['client_name']
-                
-            return False, None
-            
+
+            if needs_rehash:
+                self._save(client_name, username, _hash_pool.submit(hash_password, password).result())
+            return True, client_name
+
         except Exception:
             return False, None
+
+    def _token_signature(self, username):
+        _, password_hash = self._credentials[username]
+        # Binding the stored hash means a password change invalidates outstanding tokens
+        return hmac.new(self._token_key, f"{username}\0{password_hash}".encode(), hashlib.sha256).hexdigest()
+
+    def issue_token(self, username):
+        """Issue a session token for a username that just authenticated"""
+        self._ensure_index()
+        return f"{username}:{self._token_signature(username)}"
+
+    def verify_token(self, token):
+        """Return the client name for a valid session token, without rehashing any password"""
+        if not token or ":" not in token:
+            return None
+        username, signature = token.rsplit(":", 1)
+        self._ensure_index()
+        if username not in self._credentials:
+            return None
+        if not hmac.compare_digest(signature, self._token_signature(username)):
+            return None
+        return self._credentials[username][0]
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+import perf
+from storage import check_sort_column
+
+CLIENT_CACHE_SIZE = 256
+SUMMARY_COLUMNS = ['matter', 'minutes', 'entries']
+
+def summarize_matters(entries):
+    """Minutes and entry counts per matter for one client's entries"""
+    summary = entries.groupby(entries['matter'].astype(object), dropna=False, sort=True)['minutes'].agg(['sum', 'size'])
+    return summary.rename(columns={'sum': 'minutes', 'size': 'entries'}).reset_index()[SUMMARY_COLUMNS]
+
+class ClientCache:
+    """Per-client cache of entries and matter totals for the client portal
+
+    Each client's entries in a date range are read once, page-ready (entry ids, truncated
+    narratives, date order), and pages are then sorted and sliced from memory. Results are
+    versioned by a per-client counter: entries written through this process bump only
+    their own clients' counters, so one client's activity never evicts another's results.
+    A change made by anyone else, or a compaction renumbering entry ids, bumps them all.
+    """
+
+    def __init__(self, storage, cache_size=CLIENT_CACHE_SIZE):
+        self.storage = storage
+        self.cache_size = cache_size
+        # (client, start, end) -> (version, entries, summary), least recently used first
+        self._cache = OrderedDict()
+        self._counters = {}
+        # Bumped for every client at once
+        self._epoch = 0
+        self._version = None
+        self._ids_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        version, ids_version = self.storage.rollup_version(), self.storage.entry_ids_version()
+        if (version, ids_version) != (self._version, self._ids_version):
+            self._epoch += 1
+            self._version, self._ids_version = version, ids_version
+
+    def _client_version(self, client):
+        return (self._epoch, self._counters.get(client, 0))
+
+    def _lookup(self, client, start_date, end_date):
+        key = (client, start_date, end_date)
+        with self._lock:
+            self._check_version()
+            version = self._client_version(client)
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[1], cached[2]
+            self.misses += 1
+
+        entries = self.storage.read_entry_page(start_date, end_date, client, limit=None)
+        summary = summarize_matters(entries)
+
+        with self._lock:
+            # Don't cache a result read while this client's entries changed underneath us
+            if self._client_version(client) == version:
+                self._cache[key] = (version, entries, summary)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return entries, summary
+
+    def summary(self, client, start_date, end_date):
+        """Minutes and entries per matter for a client between dates"""
+        return self._lookup(client, start_date, end_date)[1].copy()
+
+    def page(self, client, start_date, end_date, offset=0, limit=50, sort_by='date', descending=False):
+        """One sorted page of a client's entries between dates; see read_entry_page"""
+        check_sort_column(sort_by)
+        entries = self._lookup(client, start_date, end_date)[0]
+        if sort_by != 'date' or descending:
+            entries = entries.sort_values(sort_by, ascending=not descending, kind='stable')
+        return entries.iloc[offset:offset + limit].reset_index(drop=True)
+
+    def entries_written(self, entries, before, after):
+        """Bump the counters of the clients in a frame of newly written entries
+
+        before/after are the storage's rollup_version() around the write; if the cache was
+        not at `before`, someone else wrote too and every client is invalidated.
+        """
+        with self._lock:
+            if self._version != before:
+                self._epoch += 1
+                if self._cache:
+                    perf.log_event("client_cache.invalidated", results=len(self._cache))
+            else:
+                for client in entries['client'].astype(object).unique():
+                    self._counters[client] = self._counters.get(client, 0) + 1
+            self._version = after
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._epoch += 1
+            self._version = None
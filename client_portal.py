@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
+from utils import summarize_hours
+from components import render_entry_table, render_export
+from client_auth import get_client_auth
+import perf
 
+@perf.timed()
 def render_client_portal(data_manager, client_name):
     """Render the client portal interface"""
     st.title(f"Client Portal - {client_name}")
@@ -20,35 +25,43 @@ def render_client_portal(data_manager, client_name):
         )
     
     if start_date <= end_date:
-        # Get time entries for the client
-        entries = data_manager.get_client_entries(client_name, start_date, end_date)
+        # Totals and entry pages come from this client's cache, untouched by other clients' activity
+        summary = data_manager.get_client_summary(client_name, start_date, end_date)
         
-        if not entries.empty:
+        if not summary.empty:
             # Summary statistics
-            total_hours = sum(
-                sum(int(x) * (60 if i == 0 else 1) for i, x in enumerate(duration.split(":")))
-                for duration in entries['duration']
-            ) / 60
+            total_hours = summarize_hours(summary)
             
             # Display summary metrics
             st.metric("Total Hours", f"{total_hours:.2f}")
             
             # Display detailed entries
             st.subheader("Time Entries")
-            st.dataframe(
-                entries[['date', 'matter', 'duration', 'narrative']],
-                use_container_width=True
+            render_entry_table(
+                data_manager, start_date, end_date, int(summary['entries'].sum()),
+                key="client_entries", client_name=client_name,
+                columns=('date', 'matter', 'duration', 'narrative')
             )
             
             # Export option
-            if st.button("Export to CSV"):
-                entries.to_csv(f"time_entries_{client_name}.csv", index=False)
-                st.success(f"Data exported to time_entries_{client_name}.csv")
+            render_export(
+                data_manager, start_date, end_date, client_name,
+                f"time_entries_{client_name}_{start_date}_{end_date}",
+                key="client_export"
+            )
         else:
             st.info("No time entries found for the selected date range")
     else:
         st.error("End date must be after start date")
 
+def current_client():
+    """Return the logged-in client for this session from its token, or None"""
+    client_name = get_client_auth().verify_token(st.session_state.get("client_auth_token"))
+    if client_name is None:
+        st.session_state.client_logged_in = False
+    return client_name
+
+@perf.timed()
 def render_client_login():
     """Render the client login interface"""
     st.title("Client Portal Login")
@@ -59,13 +72,13 @@ def render_client_login():
         submitted = st.form_submit_button("Login")
         
         if submitted:
-            from client_auth import ClientAuth
-            auth = ClientAuth()
+            auth = get_client_auth()
             success, client_name = auth.authenticate_client(username, password)
             
             if success:
                 st.session_state.client_logged_in = True
                 st.session_state.client_name = client_name
+                st.session_state.client_auth_token = auth.issue_token(username)
                 st.success("Login successful!")
                 st.rerun()
             else:
@@ -0,0 +1,50 @@
+import atexit
+import os
+import threading
+
+import perf
+
+# Seconds between compaction passes; 0 turns background compaction off
+COMPACTION_INTERVAL_SECONDS = float(os.environ.get("TIME_TRACKER_COMPACTION_INTERVAL", 300))
+# A live delta log this big is merged on the next pass...
+COMPACTION_MIN_DELTA_BYTES = int(os.environ.get("TIME_TRACKER_COMPACTION_MIN_DELTA_KB", 1024)) * 2**10
+# ...and a smaller one once nobody has written to it for this long
+COMPACTION_IDLE_SECONDS = float(os.environ.get("TIME_TRACKER_COMPACTION_IDLE", 600))
+
+class Compactor:
+    """Background thread that periodically merges a storage's delta logs into its snapshots
+
+    Each pass calls storage.compact() without blocking, so when several processes run a
+    compactor only one of them compacts at a time. Stopping mid-pass is safe: compaction
+    never loses entries, and the next pass finishes what was left.
+    """
+
+    def __init__(self, storage, interval=COMPACTION_INTERVAL_SECONDS,
+                 min_delta_bytes=COMPACTION_MIN_DELTA_BYTES, idle_seconds=COMPACTION_IDLE_SECONDS):
+        self.storage = storage
+        self.interval = interval
+        self.min_delta_bytes = min_delta_bytes
+        self.idle_seconds = idle_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="time-tracker-compactor", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def run_once(self):
+        """Compact whatever is due now; returns the entries merged, or None if another compaction was running"""
+        try:
+            return self.storage.compact(self.min_delta_bytes, self.idle_seconds, blocking=False)
+        except Exception as e:
+            # Retried on the next pass; the deltas stay readable meanwhile
+            perf.log_event("compaction.failed", error=str(e))
+            return None
+
+    def close(self):
+        """Stop after the pass in progress, if any"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
@@ -1,7 +1,91 @@
 import streamlit as st
 from datetime import datetime, timedelta
-import time
+import math
+import uuid
+import streamlit.components.v1 as st_components
+from utils import summarize_hours
+from exports import EXPORT_FORMATS, available_formats
+from reports import DIMENSIONS, MEASURES, TIME_DIMENSIONS
+import perf
+
+def _format_elapsed(elapsed):
+    """Format a timedelta as HH:MM"""
+    total_minutes = int(elapsed.total_seconds()) // 60
+    return f"{total_minutes // 60:02d}:{total_minutes % 60:02d}"
+
+def _restore_timer_state():
+    """Load timer state persisted in the URL so a running timer survives reconnects"""
+    if st.session_state.get('timer_restored'):
+        return
+    st.session_state.timer_restored = True
+
+    params = st.query_params
+    try:
+        elapsed = timedelta(seconds=float(params['timer_elapsed'])) if 'timer_elapsed' in params else None
+        started = datetime.fromtimestamp(float(params['timer_started'])) if 'timer_started' in params else None
+    except (ValueError, OverflowError, OSError):
+        # A malformed or hand-edited URL; drop it rather than failing the page
+        params.pop('timer_elapsed', None)
+        params.pop('timer_started', None)
+        return
+    if elapsed is not None:
+        st.session_state.elapsed_time = elapsed
+    if started is not None:
+        st.session_state.start_time = started
+        st.session_state.timer_running = True
+
+def _timer_elapsed():
+    """Time accumulated so far, including the current run if the timer is running"""
+    elapsed = st.session_state.get('elapsed_time') or timedelta()
+    if st.session_state.get('timer_running') and st.session_state.get('start_time'):
+        elapsed += datetime.now() - st.session_state.start_time
+    return elapsed
+
+def _persist_timer_state():
+    """Mirror the timer's start time and accumulated seconds into the URL"""
+    params = st.query_params
+    if st.session_state.timer_running and st.session_state.start_time:
+        params['timer_started'] = str(st.session_state.start_time.timestamp())
+    else:
+        params.pop('timer_started', None)
 
+    if st.session_state.elapsed_time:
+        params['timer_elapsed'] = str(int(st.session_state.elapsed_time.total_seconds()))
+    else:
+        params.pop('timer_elapsed', None)
+
+def reset_timer():
+    """Stop the timer and clear both session and persisted state"""
+    st.session_state.timer_running = False
+    st.session_state.start_time = None
+    st.session_state.elapsed_time = timedelta()
+    st.session_state.last_update = None
+    if 'current_duration' in st.session_state:
+        del st.session_state.current_duration
+    _persist_timer_state()
+
+def _render_ticking_clock(elapsed):
+    """Tick the elapsed time in the browser so a running timer needs no server reruns"""
+    st_components.html(f"""
+        <div style="font-family: 'Source Sans Pro', sans-serif; color: #262730;">
+            <div style="font-size: 0.875rem;">Time Elapsed</div>
+            <div id="timer" style="font-size: 2.25rem;"></div>
+        </div>
+        <script>
+            const base = {int(elapsed.total_seconds())};
+            const loaded = Date.now();
+            const pad = (n) => String(n).padStart(2, '0');
+            function tick() {{
+                const total = base + Math.floor((Date.now() - loaded) / 1000);
+                document.getElementById('timer').textContent =
+                    pad(Math.floor(total / 3600)) + ':' + pad(Math.floor(total / 60) % 60) + ':' + pad(total % 60);
+            }}
+            tick();
+            setInterval(tick, 1000);
+        </script>
+    """, height=80)
+
+@perf.timed()
 def render_timer():
     """Render the running timer component"""
     st.subheader("Timer")
@@ -11,67 +95,50 @@ def render_timer():
         st.session_state.timer_running = False
     if 'start_time' not in st.session_state:
         st.session_state.start_time = None
-    if 'elapsed_time' not in st.session_state:
+    if not st.session_state.get('elapsed_time'):
         st.session_state.elapsed_time = timedelta()
     if 'last_update' not in st.session_state:
         st.session_state.last_update = None
+    _restore_timer_state()
 
     col1, col2 = st.columns(2)
 
     with col1:
         if st.button("Start Timer" if not st.session_state.timer_running else "Stop Timer"):
             if not st.session_state.timer_running:
-                # Start the timer
+                # Start (or resume) the timer
                 st.session_state.timer_running = True
                 st.session_state.start_time = datetime.now()
-                st.session_state.last_update = datetime.now()
-                st.rerun()
+                # The total from the last stop is stale until the timer stops again
+                st.session_state.pop('current_duration', None)
             else:
-                # Stop the timer
+                # Stop the timer, keeping the time accumulated so far
                 st.session_state.timer_running = False
-                st.session_state.elapsed_time = datetime.now() - st.session_state.start_time
+                st.session_state.elapsed_time += datetime.now() - st.session_state.start_time
                 st.session_state.start_time = None
-                st.session_state.last_update = None
-                st.rerun()
+            _persist_timer_state()
+            st.rerun()
 
     with col2:
         if st.button("Reset"):
-            st.session_state.timer_running = False
-            st.session_state.start_time = None
-            st.session_state.elapsed_time = timedelta()
-            st.session_state.last_update = None
-            if 'current_duration' in st.session_state:
-                del st.session_state.current_duration
+            reset_timer()
             st.rerun()
 
     # Update timer display
     if st.session_state.timer_running and st.session_state.start_time:
-        current_time = datetime.now()
-        elapsed = current_time - st.session_state.start_time
-
-        # Display the timer
-        hours = elapsed.seconds // 3600
-        minutes = (elapsed.seconds % 3600) // 60
-        st.metric("Time Elapsed", f"{hours:02d}:{minutes:02d}")
-
-        # Store formatted time for auto-fill
-        st.session_state.current_duration = f"{hours:02d}:{minutes:02d}"
-
-        # Force a rerun every second to update the display
-        if (st.session_state.last_update is None or 
-            (current_time - st.session_state.last_update).seconds >= 1):
-            st.session_state.last_update = current_time
-            time.sleep(0.1)  # Small delay to prevent excessive reruns
-            st.rerun()
+        # The browser does the ticking; the server only renders this once per interaction
+        _render_ticking_clock(_timer_elapsed())
 
     elif st.session_state.elapsed_time:
-        hours = st.session_state.elapsed_time.seconds // 3600
-        minutes = (st.session_state.elapsed_time.seconds % 3600) // 60
-        st.metric("Time Elapsed", f"{hours:02d}:{minutes:02d}")
-        st.session_state.current_duration = f"{hours:02d}:{minutes:02d}"
+        st.metric("Time Elapsed", _format_elapsed(st.session_state.elapsed_time))
+        # Store formatted time for auto-fill
+        st.session_state.current_duration = _format_elapsed(st.session_state.elapsed_time)
 
+@perf.timed()
 def render_time_entry_form(data_manager):
     """Render the time entry form"""
+    # The form is drawn before the timer, so a timer restored from the URL must be loaded first
+    _restore_timer_state()
     st.subheader("Time Entry")
 
     with st.form("time_entry_form"):
@@ -90,9 +157,15 @@ def render_time_entry_form(data_manager):
 
         matter = st.selectbox("Matter", options=matters if matters else ["No matters available"], key="matter_select")
 
-        # Auto-fill duration from timer if available
-        default_duration = st.session_state.get('current_duration', "01:00")
-        duration = st.text_input("Duration (HH:MM)", default_duration)
+        # Auto-fill duration from timer if available; a running timer's time is taken on submit
+        timer_running = st.session_state.get('timer_running') and st.session_state.get('start_time')
+        if timer_running:
+            duration = st.text_input("Duration (HH:MM)", "", placeholder="Timer running - leave empty to use its time")
+        else:
+            # From the elapsed time itself: the timer below sets current_duration only after the form is drawn
+            elapsed = st.session_state.get('elapsed_time')
+            default = _format_elapsed(elapsed) if elapsed else st.session_state.get('current_duration', "01:00")
+            duration = st.text_input("Duration (HH:MM)", default)
         narrative = st.text_area("Narrative", height=100)
 
         submitted = st.form_submit_button("Submit Time Entry")
@@ -101,6 +174,8 @@ def render_time_entry_form(data_manager):
             if matter == "No matters available":
                 st.error("Please select a valid matter before submitting")
                 return
+            if timer_running and not duration.strip():
+                duration = _format_elapsed(_timer_elapsed())
 
             try:
                 hours, minutes = map(int, duration.split(":"))
@@ -120,36 +195,225 @@ def render_time_entry_form(data_manager):
                 st.success("Time entry added successfully!")
 
                 # Reset timer after successful submission
-                st.session_state.timer_running = False
-                st.session_state.start_time = None
-                st.session_state.elapsed_time = timedelta()
-                st.session_state.last_update = None
-                if 'current_duration' in st.session_state:
-                    del st.session_state.current_duration
+                reset_timer()
                 st.rerun()
 
             except ValueError:
                 st.error("Please enter duration in HH:MM format")
 
+ENTRY_PAGE_SIZES = [25, 50, 100]
+SEARCH_RESULT_LIMIT = 200
+REPORT_SERIES_LIMIT = 10
+# Seconds between status checks while a background job runs
+JOB_POLL_SECONDS = 1.0
+# A job finishing within this is shown straight away, without a polling round trip
+JOB_INLINE_WAIT_SECONDS = 0.2
+# sort label -> storage column
+ENTRY_SORT_OPTIONS = {"Date": "date", "Client": "client", "Matter": "matter", "Duration": "minutes"}
+
+@perf.timed()
+def render_entry_table(data_manager, start_date, end_date, total_entries, key, client_name=None,
+                       columns=('date', 'client', 'matter', 'duration', 'narrative')):
+    """Render one page of a sortable entry table; a selected row's full narrative is fetched on demand"""
+    sort_options = [label for label in ENTRY_SORT_OPTIONS if not (client_name and label == "Client")]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_label = st.selectbox("Sort by", sort_options, key=f"{key}_sort")
+    with col2:
+        descending = st.checkbox("Newest/largest first", key=f"{key}_descending")
+    with col3:
+        page_size = st.selectbox("Rows per page", ENTRY_PAGE_SIZES, key=f"{key}_page_size")
+
+    pages = max(1, math.ceil(total_entries / page_size))
+    # Keep the page in range when the filters or page size shrink the result
+    page_key = f"{key}_page"
+    # Seeded through session state only; a widget default as well makes Streamlit warn on every clamp
+    st.session_state.setdefault(page_key, 1)
+    if st.session_state[page_key] > pages:
+        st.session_state[page_key] = pages
+    with col4:
+        page_number = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+
+    offset = (page_number - 1) * page_size
+    page = data_manager.get_entry_page(
+        start_date, end_date, client_name, offset=offset, limit=page_size,
+        sort_by=ENTRY_SORT_OPTIONS[sort_label], descending=descending
+    )
+    st.caption(f"Showing {offset + 1 if len(page) else 0}-{offset + len(page)} of {total_entries} entries")
+
+    event = st.dataframe(
+        page[list(columns)],
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"{key}_table"
+    )
+    selected = event.selection.rows
+    if selected and selected[0] < len(page):
+        entry = page.iloc[selected[0]]
+        st.text_area(
+            f"Narrative - {entry['date']} {entry['matter']}",
+            data_manager.get_narrative(entry['entry_id']) or "",
+            disabled=True,
+            key=f"{key}_narrative"
+        )
+    else:
+        st.caption("Select a row to read its full narrative")
+
+@perf.timed()
 def render_daily_log(data_manager):
     """Render the daily time log view"""
     st.subheader("Daily Time Log")
 
     selected_date = st.date_input("Select Date", datetime.now())
 
-    entries = data_manager.get_daily_entries(selected_date)
-    if not entries.empty:
-        st.dataframe(entries)
+    # Totals come from the rollup, independent of the page shown
+    rollup = data_manager.get_rollup(selected_date, selected_date)
+    if not rollup.empty:
+        render_entry_table(data_manager, selected_date, selected_date, int(rollup['entries'].sum()), key="daily_log")
 
-        total_hours = sum(
-            sum(int(x) * (60 if i == 0 else 1) for i, x in enumerate(duration.split(":")))
-            for duration in entries['duration']
-        ) / 60
+        total_hours = summarize_hours(rollup)
 
         st.metric("Total Hours", f"{total_hours:.2f}")
     else:
         st.info("No entries for selected date")
 
+def _label(dimension):
+    return "None" if dimension is None else DIMENSIONS[dimension]
+
+def _job_owner():
+    """An id for this session, so a shared background job knows who is still waiting on it"""
+    if 'job_owner' not in st.session_state:
+        st.session_state.job_owner = uuid.uuid4().hex
+    return st.session_state.job_owner
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _render_job_progress(data_manager, job_id, key, request):
+    """Poll a running job's progress, rerunning the page once it has finished"""
+    job = data_manager.get_job(job_id)
+    if job is None or job.done:
+        st.rerun()
+    st.progress(job.progress, text=job.message or f"{job.label.capitalize()} {job.status}...")
+    if st.button("Cancel", key=f"{key}_cancel"):
+        data_manager.cancel_job(job_id, _job_owner())
+        st.session_state[f"{key}_cancelled"] = request
+        st.rerun()
+
+def _job_result(data_manager, key, request, submit=None, cached=None):
+    """The result for request, from cache or from this session's background job; None while it runs
+
+    cached() returns a result already at hand, served inline, or None. Otherwise the job this
+    session started for request is followed across reruns, and submit(owner), if given, starts
+    one when there is none; an identical request already running elsewhere is joined instead.
+    A cached request's finished job is used once: after that the cache serves it, and a miss
+    means its data changed and it is computed again.
+    """
+    if cached is not None:
+        result = cached()
+        if result is not None:
+            return result
+
+    if st.session_state.get(f"{key}_cancelled") == request:
+        st.info("Cancelled")
+        if submit is not None and st.button("Run again", key=f"{key}_again"):
+            del st.session_state[f"{key}_cancelled"]
+            st.rerun()
+        return None
+
+    owner = _job_owner()
+    tracked = st.session_state.get(key)
+    job = data_manager.get_job(tracked[1]) if tracked and tracked[0] == request else None
+    if job is None:
+        if tracked:
+            # This session's request changed; stop the old job unless someone else still wants it
+            data_manager.cancel_job(tracked[1], owner)
+            del st.session_state[key]
+        if submit is None:
+            return None
+        job = submit(owner)
+        st.session_state[key] = (request, job.id)
+
+    if not job.wait(JOB_INLINE_WAIT_SECONDS):
+        _render_job_progress(data_manager, job.id, key, request)
+        return None
+    if job.status != "done" or cached is not None:
+        del st.session_state[key]
+    if job.status == "failed":
+        st.error(f"{job.label.capitalize()} failed: {job.error}")
+        return None
+    if job.status == "cancelled":
+        st.info("Cancelled")
+        return None
+    return job.result
+
+def _fill_dimensions(report, dimensions):
+    """Label missing client/matter values so pivots keep them"""
+    return report.assign(**{d: report[d].fillna("(none)") for d in dimensions})
+
+@perf.timed()
+def render_report_pivot(data_manager, start_date, end_date, client, measure):
+    """Render a pivot table of one measure by the chosen row and column dimensions"""
+    col1, col2 = st.columns(2)
+    with col1:
+        rows = st.multiselect(
+            "Rows", list(DIMENSIONS), default=["matter" if client else "client"],
+            format_func=_label, key="report_rows"
+        )
+    with col2:
+        columns = st.selectbox(
+            "Columns", [None] + [d for d in DIMENSIONS if d not in rows],
+            format_func=_label, key="report_columns"
+        )
+
+    dimensions = rows + ([columns] if columns else [])
+    report = _job_result(
+        data_manager, "report_pivot_job", (start_date, end_date, tuple(dimensions), measure, client),
+        lambda owner: data_manager.submit_report(start_date, end_date, dimensions, [measure], client, owner=owner),
+        lambda: data_manager.get_cached_report(start_date, end_date, dimensions, [measure], client)
+    )
+    if report is None:
+        return
+    report = _fill_dimensions(report, dimensions)
+    if columns and rows:
+        table = report.pivot_table(index=rows, columns=columns, values=measure, aggfunc='sum', fill_value=0, observed=True)
+    elif columns:
+        table = report.set_index(columns)[[measure]].T
+    else:
+        table = report.rename(columns={**DIMENSIONS, **MEASURES})
+    st.dataframe(table, use_container_width=True)
+
+@perf.timed()
+def render_report_series(data_manager, start_date, end_date, client, measure):
+    """Render one measure over time, optionally split by client or matter"""
+    col1, col2 = st.columns(2)
+    with col1:
+        interval = st.selectbox("Interval", TIME_DIMENSIONS, index=1, format_func=_label, key="report_interval")
+    with col2:
+        split = st.selectbox("Split by", [None, "client", "matter"], format_func=_label, key="report_split")
+
+    dimensions = [interval] + ([split] if split else [])
+    report = _job_result(
+        data_manager, "report_series_job", (start_date, end_date, tuple(dimensions), measure, client),
+        lambda owner: data_manager.submit_report(start_date, end_date, dimensions, [measure], client, owner=owner),
+        lambda: data_manager.get_cached_report(start_date, end_date, dimensions, [measure], client)
+    )
+    if report is None:
+        return
+    report = _fill_dimensions(report, dimensions)
+    if split:
+        series = report.pivot_table(index=interval, columns=split, values=measure, aggfunc='sum', fill_value=0, observed=True)
+        # Keep the chart readable: the largest series, with the rest folded into "Other"
+        top = series.sum().nlargest(REPORT_SERIES_LIMIT).index
+        if len(series.columns) > len(top):
+            series = series[top].assign(Other=series.drop(columns=top).sum(axis=1))
+    else:
+        series = report.set_index(interval)[[measure]].rename(columns=MEASURES)
+
+    st.bar_chart(series)
+    st.dataframe(series, use_container_width=True)
+
+@perf.timed()
 def render_reports(data_manager):
     """Render the reporting view"""
     st.subheader("Reports")
@@ -161,32 +425,160 @@ def render_reports(data_manager):
         end_date = st.date_input("End Date", datetime.now())
 
     if start_date <= end_date:
-        df = data_manager.get_report_data(start_date, end_date)
-
-        if not df.empty:
-            # Summary by client
-            st.subheader("Summary by Client")
-            client_summary = df.groupby('client')['duration'].agg(lambda x: sum(
-                sum(int(t) * (60 if i == 0 else 1) for i, t in enumerate(d.split(":")))
-                for d in x
-            ) / 60).reset_index()
-            client_summary.columns = ['Client', 'Total Hours']
-            st.dataframe(client_summary)
-
-            # Summary by matter
-            st.subheader("Summary by Matter")
-            matter_summary = df.groupby(['client', 'matter'])['duration'].agg(lambda x: sum(
-                sum(int(t) * (60 if i == 0 else 1) for i, t in enumerate(d.split(":")))
-                for d in x
-            ) / 60).reset_index()
-            matter_summary.columns = ['Client', 'Matter', 'Total Hours']
-            st.dataframe(matter_summary)
+        # Report queries run over the daily rollup and are cached; raw entries are only read for export.
+        # Both run as background jobs, so a long one neither freezes the page nor restarts on a rerun.
+        totals = _job_result(
+            data_manager, "report_totals_job", (start_date, end_date),
+            lambda owner: data_manager.submit_report(start_date, end_date, owner=owner),
+            lambda: data_manager.get_cached_report(start_date, end_date)
+        )
+        if totals is None:
+            return
+
+        if totals['entries'].iloc[0]:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                client = st.selectbox("Client", ["All clients"] + data_manager.get_clients(), key="report_client")
+            client = None if client == "All clients" else client
+            with col2:
+                measure = st.selectbox("Measure", list(MEASURES), format_func=MEASURES.get, key="report_measure")
+            with col3:
+                view = st.radio("View", ["Pivot", "Time series"], horizontal=True, key="report_view")
+
+            if view == "Pivot":
+                render_report_pivot(data_manager, start_date, end_date, client, measure)
+            else:
+                render_report_series(data_manager, start_date, end_date, client, measure)
 
             # Export option
-            if st.button("Export to CSV"):
-                df.to_csv("time_entries_export.csv", index=False)
-                st.success("Data exported to time_entries_export.csv")
+            render_export(
+                data_manager, start_date, end_date, client,
+                f"time_entries_{client + '_' if client else ''}{start_date}_{end_date}",
+                key="report_export"
+            )
         else:
             st.info("No entries found for selected date range")
     else:
-        st.error("End date must be after start date")
\ No newline at end of file
+        st.error("End date must be after start date")
+
+@perf.timed()
+def render_search(data_manager):
+    """Render full-text search over narratives with client, matter and date filters"""
+    st.subheader("Search Narratives")
+
+    query = st.text_input(
+        "Search",
+        key="search_query",
+        help='All words must match. Use "quotes" for phrases and a trailing * for prefixes.'
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        client = st.selectbox("Client", ["All clients"] + data_manager.get_clients(), key="search_client")
+    client = None if client == "All clients" else client
+    with col2:
+        matter = st.selectbox("Matter", ["All matters"] + data_manager.get_matters(client), key="search_matter")
+    matter = None if matter == "All matters" else matter
+
+    start_date = end_date = None
+    if st.checkbox("Limit to a date range", key="search_dates"):
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("Start Date", datetime.now() - timedelta(days=365), key="search_start")
+        with col2:
+            end_date = st.date_input("End Date", datetime.now(), key="search_end")
+
+    if not query.strip():
+        st.info("Enter words to search for in time entry narratives")
+        return
+
+    results = data_manager.search_entries(query, client, matter, start_date, end_date, limit=SEARCH_RESULT_LIMIT)
+    if results.empty:
+        st.info("No matching entries")
+        return
+
+    st.caption(f"Top {len(results)} matches, best first")
+    event = st.dataframe(
+        results[['date', 'client', 'matter', 'duration', 'snippet']],
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key="search_results"
+    )
+    selected = event.selection.rows
+    if selected and selected[0] < len(results):
+        entry = results.iloc[selected[0]]
+        st.text_area(
+            f"Narrative - {entry['date']} {entry['client']} / {entry['matter']}",
+            data_manager.get_narrative(entry['entry_id']) or "",
+            disabled=True,
+            key="search_narrative"
+        )
+
+@perf.timed()
+def render_export(data_manager, start_date, end_date, client_name, file_stem, key):
+    """Render a format picker and a download button for an entry export prepared in the background"""
+    col1, col2 = st.columns(2)
+    with col1:
+        export_format = st.selectbox("Export format", available_formats(), key=f"{key}_format")
+    with col2:
+        prepare = st.button("Prepare export", key=f"{key}_prepare")
+
+    # Only a click starts an export, so writes landing meanwhile never restart one
+    request = (start_date, end_date, client_name, export_format)
+    submit = None
+    if prepare:
+        submit = lambda owner: data_manager.submit_export(start_date, end_date, export_format, client_name, owner=owner)
+        st.session_state.pop(f"{key}_job_cancelled", None)
+        tracked = st.session_state.get(f"{key}_job")
+        if tracked and tracked[0] == request:
+            job = data_manager.get_job(tracked[1])
+            # Clicking again refreshes a finished or cancelled export, but doesn't restart a running one
+            if job is None or job.done or job.cancelled:
+                del st.session_state[f"{key}_job"]
+
+    # Encoded chunk by chunk by a job and handed to the browser when done; nothing is written to disk
+    data = _job_result(data_manager, f"{key}_job", request, submit)
+    if data is not None:
+        extension, mime = EXPORT_FORMATS[export_format]
+        st.download_button(
+            f"Download {export_format}",
+            data,
+            file_name=f"{file_stem}.{extension}",
+            mime=mime,
+            key=f"{key}_download"
+        )
+
+def render_performance():
+    """Render rolling latency, rows scanned and bytes read per instrumented operation"""
+    st.subheader("Performance")
+    st.caption(f"Rolling window of the last {perf.OPERATION_WINDOW} calls per operation in this server process")
+
+    stats = perf.operation_stats()
+    if stats.empty:
+        st.info("No operations recorded yet")
+    else:
+        st.dataframe(
+            stats.sort_values('p95_ms', ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'p50_ms': st.column_config.NumberColumn("p50 (ms)", format="%.2f"),
+                'p95_ms': st.column_config.NumberColumn("p95 (ms)", format="%.2f"),
+                'max_ms': st.column_config.NumberColumn("max (ms)", format="%.2f"),
+                'avg_rows': st.column_config.NumberColumn("avg rows scanned", format="%.0f"),
+                'avg_bytes_read': st.column_config.NumberColumn("avg bytes read", format="%.0f"),
+            }
+        )
+
+    reruns = perf.recent_reruns()
+    if reruns:
+        st.subheader("Recent Reruns")
+        for summary in reruns[:10]:
+            with st.expander(f"{summary['label']} - {summary['ms']:.1f} ms"):
+                st.json(summary['operations'])
+
+    if st.button("Reset statistics"):
+        perf.reset()
+        st.rerun()
@@ -1,105 +1,138 @@
 import pandas as pd
 from datetime import datetime
-import os
+from storage import entry_frame, get_storage
+import threading
+import perf
+from writer import WriteQueue
+from reports import ReportEngine
+from client_cache import ClientCache
+from compaction import COMPACTION_INTERVAL_SECONDS, Compactor
+from jobs import JobRunner
 
+@perf.instrument
 class DataManager:
-    def __init__(self):
-        self.time_entries_file = "time_entries.csv"
-        self.clients_file = "clients.csv"
-        self.matters_file = "matters.csv"
-        self._initialize_files()
-        print("DataManager initialized") # Debug log
-
-    def _initialize_files(self):
-        """Initialize CSV files if they don't exist or are empty"""
-        # Initialize time entries file
-        if not os.path.exists(self.time_entries_file):
-            pd.DataFrame(columns=[
-                'date', 'client', 'matter', 'duration', 'narrative'
-            ]).to_csv(self.time_entries_file, index=False)
-
-        # Initialize clients file
-        if not os.path.exists(self.clients_file) or os.path.getsize(self.clients_file) <= len('client_name\n'):
-            sample_clients = pd.DataFrame({
-                'client_name': ['Sample Client A', 'Sample Client B']
-            })
-            sample_clients.to_csv(self.clients_file, index=False)
-            print(f"Initialized clients file with {len(sample_clients)} clients") # Debug log
-
-        # Initialize matters file
-        if not os.path.exists(self.matters_file) or os.path.getsize(self.matters_file) <= len('client_name,matter_name\n'):
-            sample_matters = pd.DataFrame({
-                'client_name': ['Sample Client A', 'Sample Client A', 'Sample Client B'],
-                'matter_name': ['General Matter', 'Special Project', 'Contract Review']
-            })
-            sample_matters.to_csv(self.matters_file, index=False)
-            print(f"Initialized matters file with {len(sample_matters)} matters") # Debug log
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
+        # Insertion-ordered sets: client -> None and client -> {matter: None}
+        self._clients = {}
+        self._matters = {}
+        self._index_version = None
+        self._index_lock = threading.RLock()
+        # Full-text index, opened on the first search
+        self._search = None
+        self._reports = ReportEngine(self.storage)
+        # Client portal entries and totals, per client
+        self._client_cache = ClientCache(self.storage)
+        # Long reports and exports, shared by every session asking for the same one
+        self._jobs = JobRunner()
+        # Every session's writes go through this one writer thread
+        self._writer = WriteQueue(self.storage, on_commit=self._after_commit)
+        # Log-structured backends merge their delta logs into snapshots in the background
+        self._compactor = None
+        if hasattr(self.storage, 'compact') and COMPACTION_INTERVAL_SECONDS > 0:
+            self._compactor = Compactor(self.storage)
+        self._initialize_data()
+        perf.log_event("data_manager.initialized", storage=type(self.storage).__name__)
+
+    def _initialize_data(self):
+        """Seed sample clients and matters if none exist yet"""
+        if self.storage.read_clients().empty:
+            sample_clients = [{'client_name': name} for name in ['Sample Client A', 'Sample Client B']]
+            self.storage.append_clients(sample_clients)
+            perf.log_event("data_manager.seeded_clients", count=len(sample_clients))
+
+        if self.storage.read_matters().empty:
+            sample_matters = [
+                {'client_name': 'Sample Client A', 'matter_name': 'General Matter'},
+                {'client_name': 'Sample Client A', 'matter_name': 'Special Project'},
+                {'client_name': 'Sample Client B', 'matter_name': 'Contract Review'},
+            ]
+            self.storage.append_matters(sample_matters)
+            perf.log_event("data_manager.seeded_matters", count=len(sample_matters))
+
+    def _ensure_index(self):
+        """Rebuild the client/matter index if clients or matters changed on disk"""
+        version = self.storage.reference_version()
+        if version == self._index_version:
+            return
+        with self._index_lock:
+            clients = {}
+            matters = {}
+            for name in self.storage.read_clients()['client_name'].dropna():
+                clients[str(name)] = None
+            for client, matter in self.storage.read_matters()[['client_name', 'matter_name']].dropna().itertuples(index=False):
+                matters.setdefault(str(client), {})[str(matter)] = None
+            self._clients, self._matters = clients, matters
+            self._index_version = version
+
+    def _update_index(self, before, update):
+        """Apply our own write to the index, or force a rebuild if someone else wrote too"""
+        with self._index_lock:
+            if before == self._index_version:
+                update()
+                self._index_version = self.storage.reference_version()
+            else:
+                self._index_version = None
 
     def add_time_entry(self, entry):
         """Add a new time entry"""
-        df = pd.read_csv(self.time_entries_file)
-        df = pd.concat([df, pd.DataFrame([entry])], ignore_index=True)
-        df.to_csv(self.time_entries_file, index=False)
+        self.add_time_entries([entry])
+
+    def add_time_entries(self, entries):
+        """Append a batch of time entries (dicts or a DataFrame) without rewriting existing rows
+
+        Dicts are group-committed with other sessions' writes and this returns once they are
+        durable. A DataFrame (bulk import) is already a batch and is appended directly.
+        """
+        if isinstance(entries, pd.DataFrame):
+            before = self.storage.rollup_version()
+            self.storage.append_entry_frame(entries)
+            self._after_commit({'entries': entries}, before, self.storage.rollup_version())
+        else:
+            self._writer.write('entries', entries)
+
+    def _after_commit(self, records, before, after):
+        """Bring derived views up to date after a write to storage"""
+        entries = records.get('entries')
+        if entries is None or len(entries) == 0:
+            return
+        if not isinstance(entries, pd.DataFrame):
+            entries = entry_frame(entries)
+        self._reports.entries_written(entries, before, after)
+        self._client_cache.entries_written(entries, before, after)
+        # Keep an open search index current; otherwise it catches up on its next query
+        if self._search is not None:
+            self._search.sync()
 
     def get_daily_entries(self, date):
         """Get all entries for a specific date"""
-        df = pd.read_csv(self.time_entries_file)
-        return df[df['date'] == date.strftime('%Y-%m-%d')]
+        return self.storage.read_entries(date, date)
 
     def get_clients(self):
         """Get list of all clients"""
-        try:
-            df = pd.read_csv(self.clients_file)
-            return df['client_name'].tolist() if not df.empty else []
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            return []
+        self._ensure_index()
+        return list(self._clients)
 
     def get_matters(self, client):
         """Get matters for a specific client"""
-        try:
-            if not client:
-                print("No client selected, returning empty matters list") # Debug log
-                return []
-
-            print(f"Fetching matters for client: {client}") # Debug log
-            df = pd.read_csv(self.matters_file)
-
-            if df.empty:
-                print("Matters file is empty, reinitializing") # Debug log
-                self._initialize_files()
-                df = pd.read_csv(self.matters_file)
-
-            matters = df[df['client_name'] == client]['matter_name'].tolist()
-            print(f"Found {len(matters)} matters for client {client}") # Debug log
-            return matters
-
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            print("Error reading matters file, reinitializing") # Debug log
-            self._initialize_files()
-            try:
-                df = pd.read_csv(self.matters_file)
-                matters = df[df['client_name'] == client]['matter_name'].tolist()
-                print(f"After reinitialization, found {len(matters)} matters for client {client}") # Debug log
-                return matters
-            except Exception as e:
-                print(f"Error after reinitialization: {str(e)}") # Debug log
-                return []
+        if not client:
+            return []
+        self._ensure_index()
+        return list(self._matters.get(client, ()))
 
     def add_client(self, client_name):
         """Add a new client"""
         if not client_name:
             return False, "Client name cannot be empty"
 
-        try:
-            df = pd.read_csv(self.clients_file)
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            df = pd.DataFrame(columns=['client_name'])
-
-        if client_name in df['client_name'].values:
-            return False, "Client already exists"
+        with self._index_lock:
+            self._ensure_index()
+            if client_name in self._clients:
+                return False, "Client already exists"
 
-        df = pd.concat([df, pd.DataFrame([{'client_name': client_name}])], ignore_index=True)
-        df.to_csv(self.clients_file, index=False)
+            before = self._index_version
+            self._writer.write('clients', [{'client_name': client_name}])
+            self._update_index(before, lambda: self._clients.setdefault(client_name, None))
         return True, f"Added client: {client_name}"
 
     def add_matter(self, client_name, matter_name):
@@ -107,32 +140,158 @@ class DataManager:
         if not client_name or not matter_name:
             return False, "Client and matter name cannot be empty"
 
-        try:
-            df = pd.read_csv(self.matters_file)
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            df = pd.DataFrame(columns=['client_name', 'matter_name'])
+        with self._index_lock:
+            self._ensure_index()
+            # Check if matter already exists for this client
+            if matter_name in self._matters.get(client_name, ()):
+                return False, "Matter already exists for this client"
 
-        # Check if matter already exists for this client
-        if not df.empty and ((df['client_name'] == client_name) & (df['matter_name'] == matter_name)).any():
-            return False, "Matter already exists for this client"
-
-        new_matter = {'client_name': client_name, 'matter_name': matter_name}
-        df = pd.concat([df, pd.DataFrame([new_matter])], ignore_index=True)
-        df.to_csv(self.matters_file, index=False)
+            before = self._index_version
+            new_matter = {'client_name': client_name, 'matter_name': matter_name}
+            self._writer.write('matters', [new_matter])
+            self._update_index(before, lambda: self._matters.setdefault(client_name, {}).setdefault(matter_name, None))
         return True, f"Added matter: {matter_name} for client: {client_name}"
 
-    def get_report_data(self, start_date, end_date):
-        """Get time entries between dates for reporting"""
-        df = pd.read_csv(self.time_entries_file)
-        mask = (df['date'] >= start_date.strftime('%Y-%m-%d')) & (df['date'] <= end_date.strftime('%Y-%m-%d'))
-        return df[mask]
+    def add_clients(self, client_names):
+        """Register many clients at once, skipping ones that already exist"""
+        with self._index_lock:
+            self._ensure_index()
+            new_clients = [name for name in dict.fromkeys(client_names) if name and name not in self._clients]
+            self._writer.write('clients', [{'client_name': name} for name in new_clients])
+            # Rebuilt lazily on the next lookup
+            self._index_version = None
+        return len(new_clients)
+
+    def add_matters(self, pairs):
+        """Register many (client, matter) pairs at once, adding any missing clients too"""
+        with self._index_lock:
+            self._ensure_index()
+            pairs = [(client, matter) for client, matter in dict.fromkeys(pairs) if client and matter]
+            new_clients = [client for client in dict.fromkeys(c for c, _ in pairs) if client not in self._clients]
+            new_matters = [(client, matter) for client, matter in pairs if matter not in self._matters.get(client, ())]
+            self._writer.write('clients', [{'client_name': client} for client in new_clients])
+            self._writer.write('matters', [
+                {'client_name': client, 'matter_name': matter} for client, matter in new_matters
+            ])
+            self._index_version = None
+        return len(new_clients), len(new_matters)
+
+    def import_entries(self, path, register_missing=True, error_report=None):
+        """Bulk import time entries from a CSV or JSONL file; see importer.import_entries"""
+        from importer import import_entries
+        return import_entries(self, path, register_missing=register_missing, error_report=error_report)
+
+    def import_matters(self, path):
+        """Bulk register clients and matters from a CSV or JSONL file"""
+        from importer import import_matters
+        return import_matters(self, path)
+
+    def generate_statements(self, start_date, end_date, output_dir, clients=None, workers=None):
+        """Write per-client HTML/CSV statements for a billing period; see statements.generate_statements"""
+        from statements import generate_statements
+        return generate_statements(self.storage, start_date, end_date, output_dir, clients=clients, workers=workers)
 
-    def get_client_entries(self, client_name, start_date, end_date):
+    def get_report_data(self, start_date, end_date, columns=None):
+        """Get time entries between dates for reporting, optionally only some columns"""
+        return self.storage.read_entries(start_date, end_date, columns=columns)
+
+    def get_client_entries(self, client_name, start_date, end_date, columns=None):
         """Get time entries for a specific client between dates"""
-        df = pd.read_csv(self.time_entries_file)
-        mask = (
-            (df['client'] == client_name) &
-            (df['date'] >= start_date.strftime('%Y-%m-%d')) &
-            (df['date'] <= end_date.strftime('%Y-%m-%d'))
+        return self.storage.read_entries(start_date, end_date, client=client_name, columns=columns)
+
+    def get_entry_page(self, start_date, end_date, client_name=None, offset=0, limit=50,
+                       sort_by='date', descending=False):
+        """Get one sorted page of entries between dates, with entry ids and truncated narratives
+
+        A single client's pages come from the per-client cache.
+        """
+        if client_name is not None:
+            return self._client_cache.page(
+                client_name, start_date, end_date, offset=offset, limit=limit, sort_by=sort_by, descending=descending
+            )
+        return self.storage.read_entry_page(
+            start_date, end_date, client=client_name, offset=offset, limit=limit,
+            sort_by=sort_by, descending=descending
+        )
+
+    def get_client_summary(self, client_name, start_date, end_date):
+        """Get minutes and entry counts per matter for a client between dates, from the per-client cache"""
+        return self._client_cache.summary(client_name, start_date, end_date)
+
+    def get_narrative(self, entry_id):
+        """Get the full narrative of one entry"""
+        return self.storage.read_narrative(entry_id)
+
+    def _search_index(self):
+        with self._index_lock:
+            if self._search is None:
+                from search import SearchIndex
+                self._search = SearchIndex(self.storage)
+        return self._search
+
+    def search_entries(self, query, client_name=None, matter=None, start_date=None, end_date=None, limit=100):
+        """Full-text search over narratives, best matches first"""
+        return self._search_index().search(
+            query, client=client_name, matter=matter, start_date=start_date, end_date=end_date, limit=limit
         )
-        return df[mask]
\ No newline at end of file
+
+    def sync_search_index(self):
+        """Index entries written since the full-text index was last updated"""
+        return self._search_index().sync()
+
+    def rebuild_search_index(self):
+        """Rebuild the full-text index from every time entry"""
+        return self._search_index().rebuild()
+
+    def iter_entries(self, start_date, end_date, client_name=None):
+        """Stream time entries between dates in chunks, for exports"""
+        return self.storage.iter_entries(start_date, end_date, client=client_name)
+
+    def get_report(self, start_date, end_date, dimensions=(), measures=('hours', 'entries'), client_name=None):
+        """Cached totals between dates grouped by report dimensions; see reports.ReportEngine"""
+        return self._reports.query(start_date, end_date, dimensions, measures, client=client_name)
+
+    def get_cached_report(self, start_date, end_date, dimensions=(), measures=('hours', 'entries'), client_name=None):
+        """get_report's result if it is already cached, else None"""
+        return self._reports.cached(start_date, end_date, dimensions, measures, client=client_name)
+
+    def submit_report(self, start_date, end_date, dimensions=(), measures=('hours', 'entries'),
+                      client_name=None, owner=None):
+        """Compute get_report in the background; returns a jobs.Job whose result is the report"""
+        dimensions, measures = tuple(dimensions), tuple(measures)
+        # Freshness is the report cache's business; the job only computes what it doesn't have
+        key = ('report', start_date, end_date, dimensions, measures, client_name)
+
+        def run(job):
+            job.report(0.0, "Computing report")
+            return self.get_report(start_date, end_date, dimensions, measures, client_name)
+
+        return self._jobs.submit(key, run, label="report", owner=owner)
+
+    def submit_export(self, start_date, end_date, export_format, client_name=None, owner=None):
+        """Encode an entry export in the background; returns a jobs.Job whose result is the file's bytes"""
+        from exports import write_export
+        key = ('export', start_date, end_date, export_format, client_name)
+
+        def run(job):
+            total = int(self.get_report(start_date, end_date, client_name=client_name)['entries'].iloc[0])
+            chunks = job.track(self.iter_entries(start_date, end_date, client_name), total)
+            return write_export(chunks, export_format).getvalue()
+
+        return self._jobs.submit(key, run, label="export", owner=owner)
+
+    def get_job(self, job_id):
+        """A background job by id, or None once its result has expired"""
+        return self._jobs.get(job_id)
+
+    def cancel_job(self, job_id, owner=None):
+        """Stop waiting on a background job; it is cancelled once no other session waits on it"""
+        return self._jobs.cancel(job_id, owner)
+
+    def get_rollup(self, start_date, end_date, client_name=None):
+        """Get daily minutes and entry counts per client/matter between dates"""
+        return self.storage.read_rollup(start_date, end_date, client=client_name)
+
+    def rebuild_rollup(self):
+        """Recompute the daily rollup from all time entries"""
+        return self.storage.rebuild_rollup()
@@ -0,0 +1,58 @@
+import functools
+import gzip
+import importlib.util
+import io
+from storage import TIME_ENTRY_COLUMNS
+
+# format label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+@functools.lru_cache(maxsize=None)
+def available_formats():
+    """List the export formats usable in this environment"""
+    # Only look for pyarrow here; it is imported when a Parquet export is actually written
+    if importlib.util.find_spec("pyarrow") is None:
+        return [fmt for fmt in EXPORT_FORMATS if fmt != "Parquet"]
+    return list(EXPORT_FORMATS)
+
+def _write_csv(chunks, out, compress):
+    """Write entry chunks as CSV, optionally gzip-compressed, one chunk at a time"""
+    raw = gzip.GzipFile(fileobj=out, mode='wb') if compress else out
+    text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    header = True
+    for chunk in chunks:
+        chunk[TIME_ENTRY_COLUMNS].to_csv(text, header=header, index=False)
+        header = False
+    if header:
+        text.write(','.join(TIME_ENTRY_COLUMNS) + '\n')
+    text.flush()
+    text.detach()
+    if compress:
+        raw.close()
+
+def _write_parquet(chunks, out):
+    """Write entry chunks as row groups of a single Parquet file"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in TIME_ENTRY_COLUMNS])
+    with pq.ParquetWriter(out, schema, compression='zstd') as writer:
+        for chunk in chunks:
+            chunk = chunk[TIME_ENTRY_COLUMNS].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def write_export(chunks, fmt):
+    """Encode DataFrame chunks one at a time into an in-memory file in the given export format"""
+    # Only the encoded (usually compressed) output is held; the source rows never are all at once
+    out = io.BytesIO()
+    if fmt == "Parquet":
+        _write_parquet(chunks, out)
+    else:
+        _write_csv(chunks, out, compress=(fmt == "CSV (gzip)"))
+    out.seek(0)
+    return out
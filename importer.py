@@ -0,0 +1,128 @@
+import numpy as np
+import os
+import re
+import pandas as pd
+from storage import DURATION_PATTERN, ENTRY_FRAME_COLUMNS, TIME_ENTRY_COLUMNS, split_duration
+
+IMPORT_CHUNK_ROWS = 100_000
+# Dates must be given in full as YYYY-MM-DD; partial dates and times are rejected, not guessed
+DATE_PATTERN = r'\d{4}-\d{2}-\d{2}'
+
+def read_chunks(path, columns, chunksize=IMPORT_CHUNK_ROWS, aliases=None):
+    """Stream a CSV or JSONL file as string-typed DataFrame chunks with the given columns"""
+    if path.endswith(('.jsonl', '.ndjson', '.json')):
+        reader = pd.read_json(path, lines=True, dtype=False, chunksize=chunksize)
+    else:
+        reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize)
+
+    line = 0
+    with reader:
+        for chunk in reader:
+            chunk = chunk.rename(columns=aliases or {}).reindex(columns=columns).fillna('').astype(str)
+            for column in columns:
+                chunk[column] = chunk[column].str.strip()
+            # Source line numbers (1-based, after any header) for the error report
+            chunk.index = pd.RangeIndex(line + 1, line + 1 + len(chunk), name='line')
+            line += len(chunk)
+            yield chunk
+
+def validate_entries(chunk, known_pairs=None):
+    """Split a chunk of raw entries into valid rows (with dates normalized and minutes computed)
+    and rejected rows with an error column
+
+    If known_pairs (a set of (client, matter) tuples) is given, rows for other pairs are rejected.
+    """
+    dates = chunk['date'].where(chunk['date'].str.fullmatch(DATE_PATTERN), '')
+    dates = pd.to_datetime(dates, errors='coerce', format='%Y-%m-%d')
+    hours, minutes = split_duration(chunk['duration'])
+
+    checks = [
+        (dates.isna(), "invalid date"),
+        (hours.isna() | (minutes >= 60), "invalid duration (expected HH:MM)"),
+        (chunk['client'] == '', "missing client"),
+        (chunk['matter'] == '', "missing matter"),
+    ]
+    if known_pairs is not None:
+        pairs = pd.MultiIndex.from_frame(chunk[['client', 'matter']])
+        checks.append((~pairs.isin(list(known_pairs)), "unknown client/matter"))
+
+    errors = pd.Series(
+        np.select([condition for condition, _ in checks], [message for _, message in checks], default=''),
+        index=chunk.index
+    )
+    rejected = chunk[errors != ''].assign(error=errors[errors != ''])
+
+    ok = errors == ''
+    valid = chunk[ok].assign(
+        date=dates[ok].dt.strftime('%Y-%m-%d'),
+        minutes=(hours[ok] * 60 + minutes[ok]).astype('int64')
+    )
+    return valid, rejected
+
+def validate_record(record):
+    """validate_entries for one entry dict, without the fixed cost of building frames
+
+    Returns (entry, None) with the fields stripped, the date normalized and minutes
+    computed, or (None, error) with the same error validate_entries would report.
+    """
+    entry = {column: '' if record.get(column) is None else str(record[column]).strip() for column in TIME_ENTRY_COLUMNS}
+    date = pd.to_datetime(entry['date'] if re.fullmatch(DATE_PATTERN, entry['date']) else '', errors='coerce', format='%Y-%m-%d')
+    duration = re.fullmatch(DURATION_PATTERN, entry['duration'])
+    hours, minutes = map(int, entry['duration'].split(':', 1)) if duration else (0, 0)
+
+    if pd.isna(date):
+        return None, "invalid date"
+    if duration is None or minutes >= 60:
+        return None, "invalid duration (expected HH:MM)"
+    if not entry['client']:
+        return None, "missing client"
+    if not entry['matter']:
+        return None, "missing matter"
+    return {**entry, 'date': date.strftime('%Y-%m-%d'), 'minutes': hours * 60 + minutes}, None
+
+def import_entries(data_manager, path, register_missing=True, error_report=None, chunksize=IMPORT_CHUNK_ROWS):
+    """Validate a large entry file chunk by chunk, then commit every valid row in one batched write"""
+    error_report = error_report or f"{os.path.splitext(path)[0]}.errors.csv"
+    if os.path.exists(error_report):
+        os.remove(error_report)
+
+    known_pairs = None if register_missing else {
+        (client, matter) for client in data_manager.get_clients() for matter in data_manager.get_matters(client)
+    }
+    valid_chunks = []
+    rejected_count = 0
+    for chunk in read_chunks(path, TIME_ENTRY_COLUMNS, chunksize):
+        valid, rejected = validate_entries(chunk, known_pairs)
+        valid_chunks.append(valid)
+        if not rejected.empty:
+            rejected.to_csv(error_report, mode='a', header=rejected_count == 0)
+            rejected_count += len(rejected)
+
+    valid = pd.concat(valid_chunks) if valid_chunks else pd.DataFrame(columns=ENTRY_FRAME_COLUMNS)
+    new_clients, new_matters = 0, 0
+    if register_missing and not valid.empty:
+        pairs = valid[['client', 'matter']].drop_duplicates().itertuples(index=False, name=None)
+        new_clients, new_matters = data_manager.add_matters(list(pairs))
+    data_manager.add_time_entries(valid[ENTRY_FRAME_COLUMNS])
+
+    return {
+        'imported': len(valid),
+        'rejected': rejected_count,
+        'new_clients': new_clients,
+        'new_matters': new_matters,
+        'error_report': error_report if rejected_count else None,
+    }
+
+def import_matters(data_manager, path, chunksize=IMPORT_CHUNK_ROWS):
+    """Register clients and matters from a file with client_name and (optionally) matter_name columns"""
+    new_clients, new_matters = 0, 0
+    aliases = {'client': 'client_name', 'matter': 'matter_name'}
+    for chunk in read_chunks(path, ['client_name', 'matter_name'], chunksize, aliases):
+        chunk = chunk[chunk['client_name'] != '']
+        clients = chunk['client_name'].drop_duplicates().tolist()
+        pairs = chunk[chunk['matter_name'] != ''].drop_duplicates().itertuples(index=False, name=None)
+        new_clients += data_manager.add_clients(clients)
+        added_clients, added_matters = data_manager.add_matters(list(pairs))
+        new_clients += added_clients
+        new_matters += added_matters
+    return {'new_clients': new_clients, 'new_matters': new_matters}
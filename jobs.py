@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import perf
+
+# Long reports and exports running at once; the rest wait in line
+JOB_WORKERS = int(os.environ.get("TIME_TRACKER_JOB_WORKERS", 2))
+# How long a finished job's result is kept for the sessions that started or joined it
+JOB_RESULT_TTL_SECONDS = float(os.environ.get("TIME_TRACKER_JOB_TTL", 600))
+# Finished jobs retained at most, oldest dropped first, whatever their TTL
+MAX_RETAINED_JOBS = 64
+# Total size of the finished results retained (encoded exports add up), oldest dropped first
+MAX_RETAINED_RESULT_BYTES = int(os.environ.get("TIME_TRACKER_JOB_RESULTS_MB", 256)) * 2**20
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+class JobCancelled(Exception):
+    pass
+
+def result_size(result):
+    """Approximate bytes held by a job result: an encoded file or a DataFrame, else nothing to count"""
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    if hasattr(result, 'memory_usage'):
+        return int(result.memory_usage(index=True).sum())
+    return 0
+
+class Job:
+    """One background computation: its status, progress and, once finished, its result or error"""
+
+    def __init__(self, key, label):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.label = label
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created = time.monotonic()
+        self.finished = None
+        self.size = 0
+        # Sessions waiting on this job; it is cancelled once every one of them gives up
+        self.owners = set()
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def cancelled(self):
+        """Whether the job was asked to stop; it may still be finishing its current step"""
+        return self._cancel.is_set()
+
+    def wait(self, timeout=None):
+        """Block up to timeout seconds for the job to finish; returns whether it has"""
+        return self._done.wait(timeout)
+
+    def report(self, progress, message=None):
+        """Record progress (0 to 1) from inside the job, and stop it here if it was cancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.progress = min(max(progress, 0.0), 1.0)
+        self.message = message
+
+    def track(self, chunks, total):
+        """Pass DataFrame chunks through, reporting progress as rows out of total"""
+        rows = 0
+        self.report(0.0)
+        for chunk in chunks:
+            yield chunk
+            rows += len(chunk)
+            self.report(rows / total if total else 0.0, f"{rows:,} of {total:,} entries")
+
+class JobRunner:
+    """Bounded thread pool for reports and exports too slow to run in a script thread
+
+    Jobs are identified by a key describing the request; submitting a key that is already
+    queued or running joins that job instead of starting another, so sessions asking for the
+    same thing at once share one computation. A finished job is only found by its id, by the
+    sessions that hold it, until its result expires.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, ttl=JOB_RESULT_TTL_SECONDS, max_retained=MAX_RETAINED_JOBS,
+                 max_result_bytes=MAX_RETAINED_RESULT_BYTES):
+        self.ttl = ttl
+        self.max_retained = max_retained
+        self.max_result_bytes = max_result_bytes
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="time-tracker-job")
+        # id -> Job, oldest first
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        now = time.monotonic()
+        finished = [job for job in self._jobs.values() if job.done]
+        excess = len(finished) - self.max_retained
+        excess_bytes = sum(job.size for job in finished) - self.max_result_bytes
+        for job in finished:
+            # The newest result is kept even on its own over the size limit, or it could never be fetched
+            oversize = excess_bytes > 0 and job is not finished[-1]
+            if excess > 0 or oversize or now - job.finished > self.ttl:
+                del self._jobs[job.id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+                excess -= 1
+                excess_bytes -= job.size
+
+    def submit(self, key, fn, *args, label=None, owner=None):
+        """Run fn(job, *args) in the background, or return the job already doing it for key"""
+        with self._lock:
+            self._expire()
+            job = self._by_key.get(key)
+            if job is None or job.done or job.cancelled:
+                job = Job(key, label or str(key))
+                self._jobs[job.id] = job
+                self._by_key[key] = job
+                self._pool.submit(self._run, job, fn, args)
+            if owner is not None:
+                job.owners.add(owner)
+            return job
+
+    def get(self, job_id):
+        """The job with this id, or None if it never existed or has expired"""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id, owner=None):
+        """Give up on a job for one owner, cancelling it once nobody else is waiting on it"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            job.owners.discard(owner)
+            if job.owners:
+                return False
+            job._cancel.set()
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+            return True
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status, job.result, job.error = status, result, error
+        job.size = result_size(result)
+        job.finished = time.monotonic()
+        if status == DONE:
+            job.progress = 1.0
+        job._done.set()
+
+    def _run(self, job, fn, args):
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+        started = time.perf_counter()
+        try:
+            result = fn(job, *args)
+        except JobCancelled:
+            status, result, error = CANCELLED, None, None
+        except Exception as e:
+            status, result, error = FAILED, None, str(e)
+        else:
+            status, error = DONE, None
+        with self._lock:
+            self._finish(job, status, result, error)
+        perf.log_event(
+            "job.finished", label=job.label, status=status,
+            ms=round((time.perf_counter() - started) * 1000, 3), error=error
+        )
+
+    def close(self):
+        """Cancel queued and running jobs and wait for the running ones to stop"""
+        with self._lock:
+            for job in self._jobs.values():
+                job._cancel.set()
+                if job.status == QUEUED:
+                    self._finish(job, CANCELLED)
+        self._pool.shutdown(wait=True)
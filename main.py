@@ -1,16 +1,23 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
 from data_manager import DataManager
 from components import (
     render_timer,
     render_time_entry_form,
     render_daily_log,
-    render_reports
+    render_reports,
+    render_search,
+    render_performance
 )
 from style import apply_custom_style
 from utils import initialize_session_state
-from client_portal import render_client_portal, render_client_login
+import os
+import perf
+
+@st.cache_resource
+def get_data_manager():
+    """Share one DataManager (and its cached tables) across every session in this process"""
+    return DataManager()
 
 def main():
     st.set_page_config(
@@ -22,17 +29,11 @@ def main():
     apply_custom_style()
 
     # Initialize data manager
-    data_manager = DataManager()
+    data_manager = get_data_manager()
 
     # Initialize session state
     initialize_session_state()
 
-    # Check if we're in client portal mode
-    if "client_portal" not in st.session_state:
-        st.session_state.client_portal = False
-    if "client_logged_in" not in st.session_state:
-        st.session_state.client_logged_in = False
-
     # Main title
     if not st.session_state.client_portal:
         st.title("⚖️ Legal Time Tracker")
@@ -44,18 +45,22 @@ def main():
         st.rerun()
 
     if st.session_state.client_portal:
-        if st.session_state.client_logged_in:
-            render_client_portal(data_manager, st.session_state.client_name)
+        # Only portal sessions pay for importing the portal and auth modules
+        from client_portal import render_client_portal, render_client_login, current_client
+        client_name = current_client() if st.session_state.client_logged_in else None
+        if client_name:
+            render_client_portal(data_manager, client_name)
         else:
             render_client_login()
         return
 
     # Regular admin interface continues here
     # Sidebar navigation
-    page = st.sidebar.radio(
-        "Navigation",
-        ["Time Entry", "Daily Log", "Reports", "Client/Matter Management"]
-    )
+    pages = ["Time Entry", "Daily Log", "Reports", "Search", "Client/Matter Management"]
+    # Hidden unless asked for with ?perf=1 or TIME_TRACKER_PERF_PAGE=1
+    if st.query_params.get("perf") == "1" or os.environ.get("TIME_TRACKER_PERF_PAGE") == "1":
+        pages.append("Performance")
+    page = st.sidebar.radio("Navigation", pages)
 
     if page == "Time Entry":
         col1, col2 = st.columns([2, 1])
@@ -70,6 +75,9 @@ def main():
     elif page == "Reports":
         render_reports(data_manager)
 
+    elif page == "Search":
+        render_search(data_manager)
+
     elif page == "Client/Matter Management":
         st.header("Client/Matter Management")
 
@@ -89,6 +97,7 @@ def main():
                     st.error("Please enter a client name")
 
             st.subheader("Existing Clients")
+            # Read once here, after any add above, and reused by the matter picker below
             clients = data_manager.get_clients()
             if clients:
                 st.table(pd.DataFrame(clients, columns=["Client Name"]))
@@ -100,7 +109,7 @@ def main():
             st.subheader("Add New Matter")
             selected_client = st.selectbox(
                 "Select Client",
-                [""] + data_manager.get_clients(),
+                [""] + clients,
                 key="matter_client"
             )
 
@@ -126,5 +135,9 @@ def main():
             else:
                 st.info("Please select a client to add or view matters")
 
+    elif page == "Performance":
+        render_performance()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with perf.rerun("main"):
+        main()
\ No newline at end of file
@@ -0,0 +1,170 @@
+import argparse
+from datetime import date
+
+from data_manager import DataManager
+from storage import CsvStorage, ParquetStorage, migrate_csv_to_sqlite
+
+def migrate_partitions(args):
+    """Split the legacy time_entries.csv into monthly partitions"""
+    storage = CsvStorage()
+    count = storage.migrate_time_entries()
+    print(f"Migrated {count} time entries into {storage.time_entries_dir}/")
+
+def migrate_sqlite(args):
+    """Import the CSV tables into a SQLite database"""
+    counts = migrate_csv_to_sqlite(args.db)
+    for table, count in counts.items():
+        print(f"Imported {count} rows into {table}")
+    print(f"Set TIME_TRACKER_STORAGE=sqlite TIME_TRACKER_DB={args.db} to use it")
+
+def rebuild_rollup(args):
+    """Recompute the daily rollup table from all time entries"""
+    count = DataManager().rebuild_rollup()
+    print(f"Rebuilt daily rollup with {count} rows")
+
+def convert_parquet(args):
+    """Merge the monthly CSV delta logs into date-sorted Parquet snapshots"""
+    count = ParquetStorage().convert_partitions()
+    print(f"Merged {count} time entries into Parquet snapshots")
+    print("Set TIME_TRACKER_STORAGE=parquet to read them")
+
+def search_index(args):
+    """Bring the narrative search index up to date, or rebuild it"""
+    data_manager = DataManager()
+    count = data_manager.rebuild_search_index() if args.rebuild else data_manager.sync_search_index()
+    print(f"Indexed {count} time entries for search")
+
+def import_data(args):
+    """Bulk import time entries, or clients and matters, from CSV/JSONL"""
+    data_manager = DataManager()
+    if args.kind == "entries":
+        result = data_manager.import_entries(
+            args.path, register_missing=not args.no_register, error_report=args.errors
+        )
+    else:
+        result = data_manager.import_matters(args.path)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+def generate_statements(args):
+    """Write month-end client statements for a billing period"""
+    output = args.output or f"statements-{args.start:%Y-%m-%d}-{args.end:%Y-%m-%d}"
+    manifest = DataManager().generate_statements(
+        args.start, args.end, output, clients=args.client, workers=args.workers
+    )
+    print(f"Wrote {manifest['clients']} statements ({manifest['entries']} entries, {manifest['hours']} hours) "
+          f"to {output}/ in {manifest['seconds']}s")
+
+def run_api(args):
+    """Serve the JSON API over the configured storage"""
+    from api import API_HOST, API_PORT, serve
+    host, port = args.host or API_HOST, args.port or API_PORT
+    print(f"Serving the time tracker API on http://{host}:{port}/")
+    serve(DataManager(), host=host, port=port)
+
+def run_benchmark(args):
+    """Benchmark DataManager, report and login operations on synthetic data"""
+    import benchmark
+    if args.compare:
+        benchmark.compare(*args.compare, metric=args.metric)
+        return
+    benchmark.run_suite(
+        args.rows, backend=args.backend, clients=args.clients, matters=args.matters,
+        repeat=args.repeat, seed=args.seed, output=args.output, root=args.workdir
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Legal Time Tracker maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "migrate-partitions",
+        help="Split time_entries.csv into monthly files under time_entries/"
+    ).set_defaults(func=migrate_partitions)
+
+    sqlite_parser = commands.add_parser(
+        "migrate-sqlite",
+        help="Import time entries, clients, matters and client logins into SQLite"
+    )
+    sqlite_parser.add_argument("--db", default="time_tracker.db", help="SQLite database path")
+    sqlite_parser.set_defaults(func=migrate_sqlite)
+
+    commands.add_parser(
+        "rebuild-rollup",
+        help="Recompute daily per client/matter totals used by reports"
+    ).set_defaults(func=rebuild_rollup)
+
+    commands.add_parser(
+        "convert-parquet",
+        help="Merge time_entries/*.csv delta logs into date-sorted Parquet snapshots now (also done in the background)"
+    ).set_defaults(func=convert_parquet)
+
+    search_parser = commands.add_parser(
+        "search-index",
+        help="Index narratives written since the last sync for full-text search"
+    )
+    search_parser.add_argument("--rebuild", action="store_true", help="Drop and rebuild the whole index")
+    search_parser.set_defaults(func=search_index)
+
+    import_parser = commands.add_parser(
+        "import",
+        help="Bulk import time entries, or clients/matters, from a CSV or JSONL file"
+    )
+    import_parser.add_argument("kind", choices=["entries", "matters"])
+    import_parser.add_argument("path", help="CSV or JSONL (.jsonl/.ndjson) file")
+    import_parser.add_argument("--errors", help="Where to write rejected rows (default: <path>.errors.csv)")
+    import_parser.add_argument(
+        "--no-register", action="store_true",
+        help="Reject entries for unknown client/matter pairs instead of registering them"
+    )
+    import_parser.set_defaults(func=import_data)
+
+    statements_parser = commands.add_parser(
+        "statements",
+        help="Generate HTML and CSV statements with matter subtotals for every client billed in a period"
+    )
+    statements_parser.add_argument("--start", type=date.fromisoformat, required=True, help="First day, YYYY-MM-DD")
+    statements_parser.add_argument("--end", type=date.fromisoformat, required=True, help="Last day, YYYY-MM-DD")
+    statements_parser.add_argument("--output", help="Output directory (default: statements-<start>-<end>)")
+    statements_parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    statements_parser.add_argument(
+        "--client", action="append",
+        help="Only this client; repeat for several (default: every client with entries)"
+    )
+    statements_parser.set_defaults(func=generate_statements)
+
+    api_parser = commands.add_parser(
+        "api",
+        help="Serve a JSON API for submitting entries and reading clients, matters, reports and entries"
+    )
+    api_parser.add_argument("--host", help="Interface to listen on (default: TIME_TRACKER_API_HOST or 127.0.0.1)")
+    api_parser.add_argument("--port", type=int, help="Port to listen on (default: TIME_TRACKER_API_PORT or 8502)")
+    api_parser.set_defaults(func=run_api)
+
+    bench_parser = commands.add_parser(
+        "benchmark",
+        help="Time core operations on synthetic data and write latency/memory results as JSON"
+    )
+    bench_parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000],
+        help="Dataset sizes to benchmark, e.g. --rows 10000 1000000 10000000"
+    )
+    bench_parser.add_argument("--backend", choices=["csv", "parquet", "sqlite"], default="csv")
+    bench_parser.add_argument("--clients", type=int, default=50, help="Number of synthetic clients")
+    bench_parser.add_argument("--matters", type=int, default=4, help="Matters per client")
+    bench_parser.add_argument("--repeat", type=int, default=50, help="Timed calls per operation")
+    bench_parser.add_argument("--seed", type=int, default=0, help="Seed for the data generator")
+    bench_parser.add_argument("--output", help="Results file (default: benchmark-<commit>-<backend>.json)")
+    bench_parser.add_argument("--workdir", help="Where to build the temporary dataset (default: system temp)")
+    bench_parser.add_argument(
+        "--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+        help="Compare two results files instead of running"
+    )
+    bench_parser.add_argument("--metric", default="p50_ms", help="Metric to compare (p50_ms, p95_ms, ...)")
+    bench_parser.set_defaults(func=run_benchmark)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Calls kept per operation for the rolling percentiles on the Performance page
+OPERATION_WINDOW = int(os.environ.get("TIME_TRACKER_PERF_WINDOW", 500))
+RERUN_HISTORY = 50
+
+logger = logging.getLogger("time_tracker.perf")
+if not logger.handlers:
+    # One JSON object per line on stdout, where the old debug prints went
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(os.environ.get("TIME_TRACKER_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+# operation name -> deque of (wall ms, rows scanned, bytes read)
+_operations = {}
+_reruns = deque(maxlen=RERUN_HISTORY)
+_lock = threading.Lock()
+# Per script thread: the stack of open spans and the current rerun's per-operation totals
+_local = threading.local()
+
+class _Span:
+    __slots__ = ('name', 'rows', 'bytes_read')
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.bytes_read = 0
+
+def log_event(event, **fields):
+    """Emit a structured JSON log line"""
+    logger.info(json.dumps({'event': event, 'ts': round(time.time(), 3), **fields}, default=str))
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def record_read(rows=0, bytes_read=0):
+    """Charge rows scanned and bytes read to every operation currently running on this thread"""
+    for span in getattr(_local, 'stack', ()):
+        span.rows += rows
+        span.bytes_read += bytes_read
+
+def _finish(span, elapsed_ms):
+    with _lock:
+        samples = _operations.get(span.name)
+        if samples is None:
+            samples = _operations[span.name] = deque(maxlen=OPERATION_WINDOW)
+        samples.append((elapsed_ms, span.rows, span.bytes_read))
+
+    totals = getattr(_local, 'rerun', None)
+    if totals is not None:
+        op = totals.setdefault(span.name, {'calls': 0, 'ms': 0.0, 'rows': 0, 'bytes_read': 0})
+        op['calls'] += 1
+        op['ms'] += elapsed_ms
+        op['rows'] += span.rows
+        op['bytes_read'] += span.bytes_read
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({
+            'event': 'call', 'op': span.name, 'ms': round(elapsed_ms, 3),
+            'rows': span.rows, 'bytes_read': span.bytes_read
+        }))
+
+def _timed_iteration(span, iterator, elapsed_ms):
+    """Yield from a generator with its span open while it produces each item, recording it once done"""
+    try:
+        while True:
+            # Whichever thread resumes the generator is charged, and only for the generator's own work
+            stack = _stack()
+            stack.append(span)
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed_ms += (time.perf_counter() - start) * 1000
+                stack.pop()
+            yield item
+    finally:
+        iterator.close()
+        _finish(span, elapsed_ms)
+
+def timed(name=None):
+    """Decorator recording call count, wall time, rows scanned and bytes read for a function
+
+    For a function returning a generator, the span covers producing every item, not just the call.
+    """
+    def decorate(func):
+        op_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = _stack()
+            span = _Span(op_name)
+            stack.append(span)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                stack.pop()
+                _finish(span, (time.perf_counter() - start) * 1000)
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stack.pop()
+            if inspect.isgenerator(result):
+                return _timed_iteration(span, result, elapsed_ms)
+            _finish(span, elapsed_ms)
+            return result
+        return wrapper
+    return decorate
+
+def instrument(cls):
+    """Class decorator applying timed() to every public method"""
+    for attr, value in list(vars(cls).items()):
+        if callable(value) and not attr.startswith('_'):
+            setattr(cls, attr, timed(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+@contextmanager
+def rerun(label="rerun"):
+    """Collect per-operation totals for one script run and log them as a single JSON line"""
+    _local.rerun = totals = {}
+    start = time.perf_counter()
+    try:
+        yield totals
+    finally:
+        _local.rerun = None
+        summary = {
+            'label': label,
+            'ts': round(time.time(), 3),
+            'ms': round((time.perf_counter() - start) * 1000, 3),
+            'operations': {
+                op: {**values, 'ms': round(values['ms'], 3)} for op, values in totals.items()
+            },
+        }
+        with _lock:
+            _reruns.append(summary)
+        logger.info(json.dumps({'event': 'rerun', **summary}))
+
+def operation_stats():
+    """Rolling latency percentiles, rows scanned and bytes read per operation"""
+    with _lock:
+        snapshot = {op: list(samples) for op, samples in _operations.items()}
+    rows = []
+    for op, samples in sorted(snapshot.items()):
+        values = np.array(samples, dtype=float)
+        rows.append({
+            'operation': op,
+            'calls': len(values),
+            'p50_ms': np.percentile(values[:, 0], 50),
+            'p95_ms': np.percentile(values[:, 0], 95),
+            'max_ms': values[:, 0].max(),
+            'avg_rows': values[:, 1].mean(),
+            'avg_bytes_read': values[:, 2].mean(),
+        })
+    return pd.DataFrame(rows, columns=[
+        'operation', 'calls', 'p50_ms', 'p95_ms', 'max_ms', 'avg_rows', 'avg_bytes_read'
+    ])
+
+def recent_reruns():
+    """The most recent rerun summaries, newest first"""
+    with _lock:
+        return list(reversed(_reruns))
+
+def reset():
+    """Forget all collected timings"""
+    with _lock:
+        _operations.clear()
+        _reruns.clear()
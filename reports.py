@@ -0,0 +1,137 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import perf
+
+# dimension -> column label
+DIMENSIONS = {'client': 'Client', 'matter': 'Matter', 'day': 'Day', 'week': 'ISO Week', 'month': 'Month'}
+# measure -> column label
+MEASURES = {'hours': 'Hours', 'entries': 'Entries'}
+TIME_DIMENSIONS = ['day', 'week', 'month']
+REPORT_CACHE_SIZE = 128
+
+def add_time_dimensions(rollup, dimensions):
+    """Add the day/week/month columns a report groups by, derived from the rollup's date"""
+    columns = {}
+    if 'day' in dimensions:
+        columns['day'] = rollup['date']
+    if 'month' in dimensions:
+        columns['month'] = rollup['date'].str[:7]
+    if 'week' in dimensions:
+        iso = pd.to_datetime(rollup['date'], errors='coerce').dt.isocalendar()
+        columns['week'] = (
+            iso['year'].astype('string') + '-W' + iso['week'].astype('string').str.zfill(2)
+        ).astype(object)
+    return rollup.assign(**columns) if columns else rollup
+
+def aggregate(rollup, dimensions, measures):
+    """Group a daily rollup frame by dimensions and compute the requested measures"""
+    rollup = add_time_dimensions(rollup, dimensions)
+    if dimensions:
+        totals = rollup.groupby(list(dimensions), dropna=False, observed=True, as_index=False)[['minutes', 'entries']].sum()
+    else:
+        totals = pd.DataFrame({'minutes': [rollup['minutes'].sum()], 'entries': [rollup['entries'].sum()]})
+    totals['hours'] = totals['minutes'] / 60
+    return totals[list(dimensions) + list(measures)]
+
+class ReportEngine:
+    """Report queries over the daily rollup with an LRU cache of results
+
+    A result is cached per (date range, client, dimensions, measures). New entries written
+    through this process evict only the results whose range and client they fall in; a
+    change made by anyone else clears the whole cache.
+    """
+
+    def __init__(self, storage, cache_size=REPORT_CACHE_SIZE):
+        self.storage = storage
+        self.cache_size = cache_size
+        # key -> (start, end, client, result), least recently used first
+        self._cache = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        version = self.storage.rollup_version()
+        if version != self._version:
+            self._cache.clear()
+            self._version = version
+
+    def query(self, start_date, end_date, dimensions=(), measures=('hours', 'entries'), client=None):
+        """Totals between dates grouped by dimensions, e.g. ('client', 'month'), optionally for one client"""
+        dimensions, measures = tuple(dimensions), tuple(measures)
+        unknown = [d for d in dimensions if d not in DIMENSIONS] + [m for m in measures if m not in MEASURES]
+        if unknown:
+            raise ValueError(f"Unknown report dimensions or measures: {unknown}")
+
+        key = (start_date, end_date, client, dimensions, measures)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            self.misses += 1
+            version = self._version
+
+        result = aggregate(self.storage.read_rollup(start_date, end_date, client=client), dimensions, measures)
+
+        with self._lock:
+            # Don't cache a result computed while the data changed underneath us
+            if version == self._version:
+                self._cache[key] = (start_date, end_date, client, result)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result.copy()
+
+    def _lookup(self, key):
+        self._check_version()
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return cached[3].copy()
+
+    def cached(self, start_date, end_date, dimensions=(), measures=('hours', 'entries'), client=None):
+        """The result query() would return if it is cached, else None, without computing anything"""
+        with self._lock:
+            return self._lookup((start_date, end_date, client, tuple(dimensions), tuple(measures)))
+
+    def entries_written(self, entries, before, after):
+        """Evict cached results covering a frame of newly written entries
+
+        before/after are the storage's rollup_version() around the write; if the cache was
+        not at `before`, someone else wrote too and everything is dropped.
+        """
+        dates = entries['date'].astype(object).astype(str)
+        written_clients = entries['client'].astype(object)
+        clients = set(written_clients)
+        evicted = 0
+        with self._lock:
+            if self._version != before:
+                evicted = len(self._cache)
+                self._cache.clear()
+            else:
+                for key, (start_date, end_date, client, _) in list(self._cache.items()):
+                    if client is not None and client not in clients:
+                        continue
+                    affected = pd.Series(True, index=dates.index)
+                    if start_date is not None:
+                        affected &= dates >= start_date.strftime('%Y-%m-%d')
+                    if end_date is not None:
+                        affected &= dates <= end_date.strftime('%Y-%m-%d')
+                    if client is not None:
+                        affected &= written_clients == client
+                    if affected.any():
+                        del self._cache[key]
+                        evicted += 1
+            self._version = after
+        if evicted:
+            perf.log_event("reports.evicted", results=evicted)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._version = None
@@ -0,0 +1,143 @@
+import re
+import sqlite3
+import threading
+
+import pandas as pd
+
+import perf
+
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entry_text USING fts5(
+    narrative,
+    entry_id UNINDEXED,
+    partition UNINDEXED,
+    date UNINDEXED,
+    client UNINDEXED,
+    matter UNINDEXED,
+    duration UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS indexed (
+    partition TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+"""
+SEARCH_RESULT_COLUMNS = ['entry_id', 'date', 'client', 'matter', 'duration', 'snippet', 'score']
+SEARCH_INDEX_COLUMNS = ['narrative', 'entry_id', 'partition', 'date', 'client', 'matter', 'duration']
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, "quoted phrases" and prefix* allowed"""
+    terms = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', text):
+        if phrase:
+            terms.append('"' + phrase.replace('"', '""') + '"')
+            continue
+        prefix = word.endswith('*')
+        for token in re.findall(r'\w+', word):
+            terms.append(f'"{token}"')
+        if prefix and terms and re.search(r'\w', word):
+            terms[-1] += '*'
+    return ' '.join(terms)
+
+class SearchIndex:
+    """Full-text index over time entry narratives in a SQLite FTS5 file next to the data
+
+    The index catches up on entries written since its last sync, by this process or any
+    other, so it never needs a full rebuild after the first one.
+    """
+
+    def __init__(self, storage, path=None):
+        self.storage = storage
+        self.path = path or storage.search_index_path()
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._connection().executescript(SEARCH_SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit, so sync() can take the write lock up front with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def sync(self):
+        """Index entries added since the last sync; returns how many were indexed"""
+        conn = self._connection()
+        indexed = 0
+        with self._sync_lock:
+            # Re-read the marks under the write lock so two processes never index the same rows
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                marks = {
+                    partition: (token, position)
+                    for partition, token, position in conn.execute("SELECT partition, token, position FROM indexed")
+                }
+                for partition, token, reset, position, entries in self.storage.entries_since(marks):
+                    if reset:
+                        conn.execute("DELETE FROM entry_text WHERE partition = ?", (partition,))
+                    rows = entries.assign(partition=partition)[SEARCH_INDEX_COLUMNS]
+                    rows = rows.astype(object).where(rows.notna(), None)
+                    conn.executemany(
+                        "INSERT INTO entry_text (narrative, entry_id, partition, date, client, matter, duration) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        rows.itertuples(index=False, name=None)
+                    )
+                    conn.execute(
+                        "INSERT INTO indexed (partition, token, position) VALUES (?, ?, ?) "
+                        "ON CONFLICT (partition) DO UPDATE SET token = excluded.token, position = excluded.position",
+                        (partition, token, position)
+                    )
+                    indexed += len(rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if indexed:
+            perf.log_event("search.indexed", entries=indexed, path=self.path)
+        return indexed
+
+    def search(self, query, client=None, matter=None, start_date=None, end_date=None, limit=100):
+        """Return the best-ranked entries matching a query, optionally filtered by client, matter and dates"""
+        match = fts_query(query)
+        if not match:
+            return pd.DataFrame(columns=SEARCH_RESULT_COLUMNS)
+        self.sync()
+
+        clauses, params = ["entry_text MATCH ?"], [match]
+        if client is not None:
+            clauses.append("client = ?")
+            params.append(client)
+        if matter is not None:
+            clauses.append("matter = ?")
+            params.append(matter)
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(start_date.strftime('%Y-%m-%d'))
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(end_date.strftime('%Y-%m-%d'))
+
+        # bm25() is lower for better matches
+        results = pd.read_sql_query(
+            "SELECT entry_id, date, client, matter, duration, "
+            "snippet(entry_text, 0, '**', '**', '…', 16) AS snippet, bm25(entry_text) AS score "
+            f"FROM entry_text WHERE {' AND '.join(clauses)} ORDER BY score LIMIT ?",
+            self._connection(), params=params + [limit]
+        )
+        perf.record_read(rows=len(results))
+        return results
+
+    def rebuild(self):
+        """Drop the index and build it again from every entry"""
+        with self._sync_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entry_text")
+            conn.execute("DELETE FROM indexed")
+            conn.execute("COMMIT")
+        return self.sync()
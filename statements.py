@@ -0,0 +1,171 @@
+import csv
+import hashlib
+import html
+import itertools
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from operator import itemgetter
+
+import pandas as pd
+
+import perf
+
+# Clients rendered per worker task; small enough to balance, large enough to amortize pickling
+STATEMENT_BATCH_CLIENTS = 25
+STATEMENT_ROW_COLUMNS = ['matter', 'date', 'duration', 'minutes', 'narrative']
+STATEMENT_CSV_COLUMNS = ['line', 'date', 'matter', 'duration', 'hours', 'narrative']
+MANIFEST_NAME = "manifest.json"
+
+STATEMENT_STYLE = """
+body { font-family: sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; width: 100%; margin-bottom: 1.5em; }
+th, td { border-bottom: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; }
+td.num, th.num { text-align: right; }
+tr.subtotal td { font-weight: bold; }
+"""
+
+def statement_basename(client):
+    """A filesystem-safe, collision-free file name stem for a client"""
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', client).strip('-')[:60] or 'client'
+    return f"{slug}-{hashlib.sha1(client.encode('utf-8')).hexdigest()[:8]}"
+
+def _hours(minutes):
+    return f"{minutes / 60:.2f}"
+
+def _replace_atomically(path, write):
+    """Stream a file through write(f) into a temporary name, then move it into place"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def _write_csv(f, matters):
+    writer = csv.writer(f)
+    writer.writerow(STATEMENT_CSV_COLUMNS)
+    for matter, entries, minutes in matters:
+        writer.writerows(
+            ['entry', date, matter, duration, _hours(entry_minutes), narrative]
+            for date, duration, entry_minutes, narrative in entries
+        )
+        writer.writerow(['subtotal', '', matter, '', _hours(minutes), f"{len(entries)} entries"])
+    writer.writerow(['total', '', '', '', _hours(sum(minutes for _, _, minutes in matters)), ''])
+
+def _write_html(f, client, start_date, end_date, matters):
+    esc = html.escape
+    f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Statement - {esc(client)}</title>"
+            f"<style>{STATEMENT_STYLE}</style></head><body>\n")
+    f.write(f"<h1>{esc(client)}</h1>\n<p>Statement for {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}</p>\n")
+
+    f.write("<h2>Summary</h2>\n<table><tr><th>Matter</th><th class=\"num\">Entries</th><th class=\"num\">Hours</th></tr>\n")
+    for matter, entries, minutes in matters:
+        f.write(f"<tr><td>{esc(matter)}</td><td class=\"num\">{len(entries)}</td><td class=\"num\">{_hours(minutes)}</td></tr>\n")
+    f.write(f"<tr class=\"subtotal\"><td>Total</td><td class=\"num\">{sum(len(entries) for _, entries, _ in matters)}</td>"
+            f"<td class=\"num\">{_hours(sum(minutes for _, _, minutes in matters))}</td></tr>\n</table>\n")
+
+    f.write("<h2>Detail</h2>\n")
+    for matter, entries, minutes in matters:
+        f.write(f"<h3>{esc(matter)}</h3>\n<table><tr><th>Date</th><th>Duration</th>"
+                "<th class=\"num\">Hours</th><th>Narrative</th></tr>\n")
+        f.writelines(
+            f"<tr><td>{esc(date)}</td><td>{esc(duration)}</td>"
+            f"<td class=\"num\">{_hours(entry_minutes)}</td><td>{esc(narrative)}</td></tr>\n"
+            for date, duration, entry_minutes, narrative in entries
+        )
+        f.write(f"<tr class=\"subtotal\"><td colspan=\"2\">Subtotal</td>"
+                f"<td class=\"num\">{_hours(minutes)}</td><td></td></tr>\n</table>\n")
+    f.write("</body></html>\n")
+
+def render_statement(client, rows, start_date, end_date, output_dir):
+    """Write one client's HTML and CSV statements and return its manifest row
+
+    rows are (matter, date, duration, minutes, narrative) tuples sorted by matter and date.
+    """
+    matters = []
+    for matter, group in itertools.groupby(rows, key=itemgetter(0)):
+        entries = [row[1:] for row in group]
+        matters.append((matter, entries, sum(entry[2] for entry in entries)))
+    basename = statement_basename(client)
+    html_name, csv_name = f"{basename}.html", f"{basename}.csv"
+    _replace_atomically(os.path.join(output_dir, csv_name), lambda f: _write_csv(f, matters))
+    _replace_atomically(
+        os.path.join(output_dir, html_name),
+        lambda f: _write_html(f, client, start_date, end_date, matters)
+    )
+    minutes = sum(matter_minutes for _, _, matter_minutes in matters)
+    return {
+        'client': client,
+        'matters': len(matters),
+        'entries': len(rows),
+        'minutes': minutes,
+        'hours': round(minutes / 60, 2),
+        'html': html_name,
+        'csv': csv_name,
+    }
+
+def _render_batch(batch, start_date, end_date, output_dir):
+    return [render_statement(client, rows, start_date, end_date, output_dir) for client, rows in batch]
+
+def _client_batches(storage, start_date, end_date, clients):
+    """Read the period once and split it into batches of (client, rows), biggest clients first"""
+    chunks = [
+        chunk if clients is None else chunk[chunk['client'].isin(clients)]
+        for chunk in storage.iter_entries(start_date, end_date)
+    ]
+    chunks = [chunk for chunk in chunks if not chunk.empty]
+    if not chunks:
+        return []
+    # One sort for the whole period, then plain tuples: cheap to pickle and to render row by row
+    entries = pd.concat(chunks, ignore_index=True).sort_values(['client', 'matter', 'date'], kind='stable')
+    entries = entries[['client'] + STATEMENT_ROW_COLUMNS].astype(object).fillna('')
+    entries['minutes'] = entries['minutes'].astype(int)
+    by_client = [
+        (client, [row[1:] for row in group])
+        for client, group in itertools.groupby(entries.itertuples(index=False, name=None), key=itemgetter(0))
+    ]
+    by_client.sort(key=lambda item: len(item[1]), reverse=True)
+    return [by_client[i:i + STATEMENT_BATCH_CLIENTS] for i in range(0, len(by_client), STATEMENT_BATCH_CLIENTS)]
+
+def generate_statements(storage, start_date, end_date, output_dir, clients=None, workers=None):
+    """Write an HTML and a CSV statement for every client with entries in a billing period
+
+    The period is read once, then clients are rendered in batches across a process pool,
+    each statement streamed to its own file. manifest.json is written last, so its presence
+    means the run completed. Returns the manifest.
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    clients = None if clients is None else set(clients)
+    batches = _client_batches(storage, start_date, end_date, clients)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(batches)))
+
+    statements = []
+    if workers == 1:
+        for batch in batches:
+            statements.extend(_render_batch(batch, start_date, end_date, output_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render_batch, batch, start_date, end_date, output_dir) for batch in batches]
+            for future in as_completed(futures):
+                statements.extend(future.result())
+    statements.sort(key=lambda row: row['client'])
+
+    manifest = {
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'workers': workers,
+        'clients': len(statements),
+        'entries': sum(row['entries'] for row in statements),
+        'hours': round(sum(row['minutes'] for row in statements) / 60, 2),
+        'seconds': round(time.perf_counter() - start, 3),
+        'statements': statements,
+    }
+    _replace_atomically(os.path.join(output_dir, MANIFEST_NAME), lambda f: json.dump(manifest, f, indent=2))
+    perf.log_event(
+        "statements.generated", clients=manifest['clients'], entries=manifest['entries'],
+        workers=workers, seconds=manifest['seconds'], output_dir=output_dir
+    )
+    return manifest
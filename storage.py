@@ -0,0 +1,1352 @@
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+import fcntl
+import glob
+import operator
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import perf
+
+TIME_ENTRY_COLUMNS = ['date', 'client', 'matter', 'duration', 'narrative']
+CLIENT_COLUMNS = ['client_name']
+MATTER_COLUMNS = ['client_name', 'matter_name']
+CREDENTIAL_COLUMNS = ['client_name', 'username', 'password_hash']
+# Entry frames handed to callers also carry the duration as integer minutes
+ENTRY_FRAME_COLUMNS = TIME_ENTRY_COLUMNS + ['minutes']
+ROLLUP_KEYS = ['date', 'client', 'matter']
+ROLLUP_COLUMNS = ROLLUP_KEYS + ['minutes', 'entries']
+DURATION_PATTERN = r'\s*\d+:\d{1,2}\s*'
+UNDATED_PARTITION = 'undated'
+EXPORT_CHUNK_ROWS = 50_000
+# Entry tables show this much of each narrative; the full text is fetched by entry id
+NARRATIVE_PREVIEW_CHARS = 80
+ENTRY_PAGE_COLUMNS = ['entry_id'] + ENTRY_FRAME_COLUMNS
+ENTRY_SORT_COLUMNS = ['date', 'client', 'matter', 'minutes']
+# Cached entry partitions leave out the narrative; it is loaded only for views that show it
+COMPACT_ENTRY_COLUMNS = ['date', 'client', 'matter', 'duration', 'minutes']
+CATEGORICAL_ENTRY_COLUMNS = ['date', 'client', 'matter', 'duration']
+# Memory for the narratives of recently viewed partitions, least recently used evicted first
+NARRATIVE_CACHE_BYTES = int(os.environ.get("TIME_TRACKER_NARRATIVE_CACHE_MB", 128)) * 2**20
+# A rollup month is rewritten folded once its file holds this many more delta rows than keys
+ROLLUP_FOLD_SLACK_ROWS = 1000
+# Parquet snapshot metadata: the last delta generation merged into it
+ABSORBED_GENERATION_KEY = b'time_tracker.absorbed_generation'
+
+@contextmanager
+def locked(file):
+    """Hold an exclusive advisory lock on an open file"""
+    fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    try:
+        yield file
+    finally:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+def file_signature(path):
+    """Return (mtime_ns, size) for a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def fsync_directory(path):
+    """Make renames and replacements inside a directory durable"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def ends_with_newline(path):
+    """Check whether a non-empty file ends with a newline (hand-edited CSVs often don't)"""
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+def months_between(start_date, end_date):
+    """Yield the 'YYYY-MM' partition names overlapping a date range"""
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def split_duration(durations):
+    """Split a Series of 'HH:MM' strings into (hours, minutes) Series, NaN where unparseable"""
+    durations = durations.astype(object).where(durations.notna(), '').astype(str)
+    valid = durations.str.fullmatch(DURATION_PATTERN)
+    if not len(durations):
+        empty = pd.Series(dtype='int64', index=durations.index)
+        return empty, empty
+    # split + astype stays vectorized, unlike str.extract which runs a Python regex per row
+    parts = durations.where(valid, '0:0').str.strip().str.split(':', n=1, expand=True)
+    return parts[0].astype('int64').where(valid), parts[1].astype('int64').where(valid)
+
+def duration_to_minutes(durations):
+    """Convert a Series of 'HH:MM' strings to integer minutes (0 if unparseable)"""
+    hours, minutes = split_duration(durations)
+    return (hours * 60 + minutes).fillna(0).astype('int64')
+
+def with_minutes(df):
+    """Return a frame of time entries with the integer minutes column added"""
+    return df.assign(minutes=duration_to_minutes(df['duration']))
+
+def as_text(values):
+    """A Series as strings with missing values left missing (astype('str') on pandas 2 writes 'None'/'nan')"""
+    return values.astype('str').where(values.notna())
+
+def partitions_for(dates):
+    """Map a Series of entry date strings to monthly partition names ('YYYY-MM' or 'undated')"""
+    dates = dates.astype(object).where(dates.notna(), '').astype(str)
+    return dates.str[:7].where(dates.str.match(r'\d{4}-\d{2}-\d{2}'), UNDATED_PARTITION)
+
+def compact_entries(df, clients=(), matters=()):
+    """Entry frame without narratives: sorted categorical date/client/matter/duration and int32 minutes
+
+    Categories are the given client/matter vocabularies (sorted Indexes are used as they are
+    when they cover every value) plus any other values present, kept sorted so sorting and
+    range filters on the codes match string order.
+    """
+    vocabularies = {'client': clients, 'matter': matters}
+    columns = {}
+    for column in CATEGORICAL_ENTRY_COLUMNS:
+        values = df[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = as_text(values).astype('category')
+        vocabulary = vocabularies.get(column, ())
+        present = values.cat.categories
+        if isinstance(vocabulary, pd.Index) and (vocabulary.get_indexer(present) >= 0).all():
+            categories = vocabulary
+        else:
+            categories = sorted(set(vocabulary).union(present))
+        columns[column] = values.cat.set_categories(categories)
+    if 'minutes' in df.columns:
+        columns['minutes'] = df['minutes'].astype('int32')
+    else:
+        # Parse each distinct duration once rather than every row
+        duration = columns['duration']
+        minutes = duration_to_minutes(pd.Series(duration.cat.categories, dtype=object)).to_numpy()
+        columns['minutes'] = pd.Series(np.append(minutes, 0)[duration.cat.codes.to_numpy()], index=df.index, dtype='int32')
+    return pd.DataFrame(columns, index=df.index)[COMPACT_ENTRY_COLUMNS]
+
+def concat_frames(frames, **kwargs):
+    """pd.concat that keeps categorical columns categorical by taking the union of their categories"""
+    frames = list(frames)
+    if len(frames) > 1:
+        for column in frames[0].columns:
+            dtypes = [df[column].dtype for df in frames]
+            if not any(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes) or all(dtype == dtypes[0] for dtype in dtypes):
+                continue
+            categories = set()
+            for df, dtype in zip(frames, dtypes):
+                categories.update(dtype.categories if isinstance(dtype, pd.CategoricalDtype) else df[column].dropna().astype('str').unique())
+            dtype = pd.CategoricalDtype(sorted(categories))
+            # Only frames missing some categories are recoded, e.g. the new rows, not the cached partition
+            frames = [df if df[column].dtype == dtype else df.assign(**{column: df[column].astype(dtype)}) for df in frames]
+    return pd.concat(frames, **kwargs)
+
+def entry_frame(entries):
+    """Build a time entry frame from a list of entry dicts"""
+    return pd.DataFrame([[entry.get(column) for column in TIME_ENTRY_COLUMNS] for entry in entries], columns=TIME_ENTRY_COLUMNS)
+
+def preview_narratives(narratives):
+    """Truncate a Series of narratives to NARRATIVE_PREVIEW_CHARS for display in a table"""
+    text = narratives.astype(object).where(narratives.notna(), '').astype(str)
+    return text.where(text.str.len() <= NARRATIVE_PREVIEW_CHARS, text.str.slice(0, NARRATIVE_PREVIEW_CHARS - 1) + '…')
+
+def check_sort_column(sort_by):
+    if sort_by not in ENTRY_SORT_COLUMNS:
+        raise ValueError(f"Cannot sort entries by {sort_by!r}; expected one of {ENTRY_SORT_COLUMNS}")
+
+def aggregate_rollup(df):
+    """Sum rollup rows (or raw entries with a minutes column) per (date, client, matter)"""
+    if 'entries' not in df.columns:
+        df = df.assign(entries=1)
+    return df.groupby(ROLLUP_KEYS, dropna=False, observed=True, as_index=False)[['minutes', 'entries']].sum()
+
+def _rollup_keys(df):
+    """Hashable (date, client, matter) tuples, with missing values as None"""
+    return zip(*(df[key].astype(object).where(df[key].notna(), None) for key in ROLLUP_KEYS))
+
+def index_rollup(df):
+    """(aggregated rollup, {key: row position}, rows read) for a cached rollup month; see fold_rollup"""
+    rollup = aggregate_rollup(df)
+    return rollup, {key: row for row, key in enumerate(_rollup_keys(rollup))}, len(df)
+
+def fold_rollup(indexed, rows):
+    """Add new rollup rows into an index_rollup() result by key, without regrouping the month
+
+    Returns a new frame; the positions dict is extended in place, as only new keys are added.
+    """
+    rollup, positions, rows_read = indexed
+    minutes, entries = rollup['minutes'].to_numpy().copy(), rollup['entries'].to_numpy().copy()
+    added = []
+    for row, (key, row_minutes, row_entries) in enumerate(zip(_rollup_keys(rows), rows['minutes'], rows['entries'])):
+        position = positions.get(key)
+        if position is None:
+            positions[key] = len(rollup) + len(added)
+            added.append(row)
+        else:
+            minutes[position] += row_minutes
+            entries[position] += row_entries
+    rollup = rollup.assign(minutes=minutes, entries=entries)
+    if added:
+        added = rows.iloc[added][ROLLUP_COLUMNS]
+        added = added.assign(**{key: as_text(added[key]) for key in ROLLUP_KEYS})
+        rollup = pd.concat([rollup, added], ignore_index=True)
+    return rollup, positions, rows_read + len(rows)
+
+def compare(values, op, value):
+    """op(values, value) as a boolean array for op in operator.ge/le/eq
+
+    Sorted categoricals are compared by code against the value's position in the categories,
+    without touching a single string.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return op(values, value).to_numpy(dtype=bool, na_value=False)
+    if not values.cat.categories.is_monotonic_increasing:
+        return op(as_text(values), value).to_numpy(dtype=bool, na_value=False)
+    categories, codes = values.cat.categories, values.cat.codes.to_numpy()
+    # Values below, equal to and above value have codes in [0, left), [left, right) and [right, n); missing is -1
+    left, right = categories.searchsorted(value, side='left'), categories.searchsorted(value, side='right')
+    if op is operator.ge:
+        return codes >= left
+    if op is operator.le:
+        return (codes >= 0) & (codes < right)
+    return (codes >= left) & (codes < right)
+
+def date_bounds(dates, start_date=None, end_date=None):
+    """(first, stop) row positions of a date range in a date-sorted categorical column, by binary search"""
+    categories, codes = dates.cat.categories, dates.cat.codes.to_numpy()
+    # Missing dates (code -1) come first in sorted codes and are never in a range
+    first = int(codes.searchsorted(0)) if start_date is not None or end_date is not None else 0
+    stop = len(codes)
+    if start_date is not None:
+        first = int(codes.searchsorted(categories.searchsorted(start_date.strftime('%Y-%m-%d'), side='left')))
+    if end_date is not None:
+        stop = int(codes.searchsorted(categories.searchsorted(end_date.strftime('%Y-%m-%d'), side='right')))
+    return first, max(first, stop)
+
+def range_mask(df, start_date=None, end_date=None, client=None):
+    """Boolean mask selecting rows of an entry or rollup frame by date range and client"""
+    mask = np.ones(len(df), dtype=bool)
+    if start_date is not None:
+        mask &= compare(df['date'], operator.ge, start_date.strftime('%Y-%m-%d'))
+    if end_date is not None:
+        mask &= compare(df['date'], operator.le, end_date.strftime('%Y-%m-%d'))
+    if client is not None:
+        mask &= compare(df['client'], operator.eq, client)
+    return pd.Series(mask, index=df.index)
+
+def absorbed_generation(schema):
+    """The last delta generation merged into a Parquet snapshot, from its schema metadata"""
+    return int((schema.metadata or {}).get(ABSORBED_GENERATION_KEY, 0))
+
+def get_storage():
+    """Build the storage backend selected by TIME_TRACKER_STORAGE (csv, parquet or sqlite)"""
+    backend = os.environ.get("TIME_TRACKER_STORAGE", "csv").lower()
+    if backend == "sqlite":
+        return SqliteStorage(os.environ.get("TIME_TRACKER_DB", "time_tracker.db"))
+    if backend == "parquet":
+        return ParquetStorage()
+    if backend != "csv":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return CsvStorage()
+
+class CsvStorage:
+    """Time entries in monthly CSV partitions, reference data in flat CSV files"""
+
+    def __init__(self, root="."):
+        self.root = root
+        self.time_entries_file = os.path.join(root, "time_entries.csv")
+        self.time_entries_dir = os.path.join(root, "time_entries")
+        self.clients_file = os.path.join(root, "clients.csv")
+        self.matters_file = os.path.join(root, "matters.csv")
+        self.credentials_file = os.path.join(root, "client_auth.csv")
+        # Legacy single-file rollup, replaced by monthly files in rollup_dir
+        self.rollup_file = os.path.join(root, "daily_rollup.csv")
+        self.rollup_dir = os.path.join(root, "daily_rollup")
+        # path -> (file signature, version, parsed DataFrame)
+        self._tables = {}
+        # path -> (file signature, version, narrative Series), least recently used first
+        self._narratives = OrderedDict()
+        self._vocabulary = (None, (), ())
+        self._versions = {}
+        self._lock = threading.RLock()
+        self.version = 0
+        if not os.path.isdir(self.time_entries_dir):
+            self.migrate_time_entries()
+        if not os.path.isdir(self.rollup_dir):
+            self.rebuild_rollup()
+            if os.path.exists(self.rollup_file):
+                os.rename(self.rollup_file, f"{self.rollup_file}.migrated")
+
+    def invalidate(self, path=None):
+        """Force the next read of one table (or all tables) to reparse from disk"""
+        with self._lock:
+            paths = [path] if path else list(self._tables)
+            for p in paths:
+                self._versions[p] = self._versions.get(p, 0) + 1
+            self.version += 1
+
+    def _read_table(self, path, columns, prepare=None, **read_options):
+        """Return a parsed CSV, reparsing only when the file or its version changed"""
+        signature = file_signature(path)
+        with self._lock:
+            version = self._versions.get(path, 0)
+            cached = self._tables.get(path)
+            if cached and cached[0] == signature and cached[1] == version:
+                return cached[2]
+
+            try:
+                df = pd.read_csv(path, **read_options)
+            except (FileNotFoundError, pd.errors.EmptyDataError):
+                df = pd.DataFrame(columns=columns)
+            perf.record_read(bytes_read=signature[1] if signature else 0)
+            if prepare:
+                df = prepare(df)
+
+            self._tables[path] = (signature, version, df)
+            self.version += 1
+            return df
+
+    def _read_narratives(self, path):
+        """Return the narrative column of an entry CSV, keeping recently used ones within NARRATIVE_CACHE_BYTES"""
+        signature = file_signature(path)
+        with self._lock:
+            version = self._versions.get(path, 0)
+            cached = self._narratives.get(path)
+            if cached and cached[0] == signature and cached[1] == version:
+                self._narratives.move_to_end(path)
+                return cached[2]
+
+            try:
+                narratives = self._load_narratives(path)
+            except (FileNotFoundError, pd.errors.EmptyDataError):
+                narratives = pd.Series(dtype='str')
+            perf.record_read(bytes_read=signature[1] if signature else 0)
+
+            self._narratives[path] = (signature, version, narratives)
+            cached_bytes = sum(cached[2].nbytes for cached in self._narratives.values())
+            while cached_bytes > NARRATIVE_CACHE_BYTES and len(self._narratives) > 1:
+                cached_bytes -= self._narratives.popitem(last=False)[1][2].nbytes
+            return narratives
+
+    def _load_narratives(self, path):
+        return pd.read_csv(path, usecols=['narrative'], dtype={'narrative': 'str'})['narrative']
+
+    def _compact_entries(self, df):
+        """Prepare an entry partition for the cache, with categories seeded from clients and matters"""
+        version = self.reference_version()
+        if self._vocabulary[0] != version:
+            self._vocabulary = (
+                version,
+                pd.Index(sorted(self.read_clients()['client_name'].dropna().astype('str').unique()), dtype='str'),
+                pd.Index(sorted(self.read_matters()['matter_name'].dropna().astype('str').unique()), dtype='str'),
+            )
+        return compact_entries(df, *self._vocabulary[1:])
+
+    def _append_rows(self, path, columns, records, prepare=None):
+        """Append row dicts to a CSV; see _append_frame"""
+        rows = [[record.get(column) for column in columns] for record in records]
+        if rows:
+            self._append_frame(path, pd.DataFrame(rows, columns=columns), columns, prepare)
+
+    def _append_frame(self, path, rows, columns, prepare=None, fold=None):
+        """Append a frame's columns to a CSV under a file lock and fold its rows into the cached table
+
+        fold(cached, rows) combines the cached table with the new rows; by default they are
+        prepared and concatenated.
+        """
+        if rows.empty:
+            return
+
+        with self._lock:
+            with self._open_for_append(path) as f:
+                before = file_signature(path)
+                # Another writer may have created the file since we opened it
+                header = os.fstat(f.fileno()).st_size == 0
+                if not header and not ends_with_newline(path):
+                    f.write('\n')
+                rows[columns].to_csv(f, header=header, index=False, lineterminator='\n')
+                f.flush()
+                # Callers are told the write is durable once this returns
+                os.fsync(f.fileno())
+                after = file_signature(path)
+
+            # Only patch the cache if nobody else touched the file since we last read it
+            cached = self._tables.get(path)
+            version = self._versions.get(path, 0)
+            if cached and cached[0] == before and cached[1] == version:
+                if fold:
+                    df = fold(cached[2], rows)
+                else:
+                    new_rows = prepare(rows) if prepare else rows
+                    df = new_rows if cached[2].empty else concat_frames([cached[2], new_rows], ignore_index=True)
+                self._tables[path] = (after, version, df)
+            else:
+                self._tables.pop(path, None)
+            narratives = self._narratives.get(path)
+            if narratives and narratives[0] == before and narratives[1] == version:
+                self._narratives[path] = (after, version, pd.concat(
+                    [narratives[2], as_text(rows['narrative'])], ignore_index=True
+                ))
+            else:
+                self._narratives.pop(path, None)
+            self.version += 1
+
+    @contextmanager
+    def _open_for_append(self, path):
+        """Open a file for appending under its lock, following atomic replacements"""
+        while True:
+            f = open(path, 'a', newline='')
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            # If the file was swapped out (e.g. a rollup rebuild) while we waited, retry on the new one
+            if os.path.exists(path) and os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+                break
+            f.close()
+        try:
+            yield f
+        finally:
+            f.close()
+
+    def _replace_file(self, path, df, expected=None):
+        """Atomically replace a CSV while holding its lock so appenders wait and retry
+
+        With expected, the file is only replaced if it still has that signature; returns
+        whether it was replaced.
+        """
+        with self._lock, self._open_for_append(path):
+            if expected is not None and file_signature(path) != expected:
+                return False
+            staging_path = f"{path}.tmp"
+            with open(staging_path, 'w', newline='') as f:
+                df.to_csv(f, index=False, lineterminator='\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(staging_path, path)
+            fsync_directory(os.path.dirname(path) or '.')
+            self.invalidate(path)
+            return True
+
+    def migrate_time_entries(self):
+        """Split the legacy time_entries.csv into monthly partition files"""
+        if os.path.isdir(self.time_entries_dir):
+            return 0
+        if not os.path.exists(self.time_entries_file):
+            os.makedirs(self.time_entries_dir, exist_ok=True)
+            return 0
+
+        with open(self.time_entries_file, 'r+') as legacy, locked(legacy):
+            # Another process may have finished the migration while we waited
+            if os.path.isdir(self.time_entries_dir):
+                return 0
+
+            try:
+                df = pd.read_csv(self.time_entries_file, dtype=str, keep_default_na=False)
+            except pd.errors.EmptyDataError:
+                df = pd.DataFrame(columns=TIME_ENTRY_COLUMNS)
+
+            # Build the partitions next to the target and swap them in atomically
+            staging_dir = f"{self.time_entries_dir}.migrating"
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            os.makedirs(staging_dir)
+            for partition, rows in df.groupby(partitions_for(df['date']), sort=True):
+                rows[TIME_ENTRY_COLUMNS].to_csv(os.path.join(staging_dir, f"{partition}.csv"), index=False)
+            os.rename(staging_dir, self.time_entries_dir)
+            os.rename(self.time_entries_file, f"{self.time_entries_file}.migrated")
+
+        perf.log_event("storage.migrated_partitions", entries=len(df), directory=self.time_entries_dir)
+        return len(df)
+
+    def _partition_path(self, partition):
+        return os.path.join(self.time_entries_dir, f"{partition}.csv")
+
+    def _partition_paths(self, start_date, end_date):
+        """List existing partition files overlapping a date range (all of them if unbounded)"""
+        if start_date is None or end_date is None:
+            return sorted(glob.glob(os.path.join(self.time_entries_dir, "*.csv")))
+        paths = map(self._partition_path, months_between(start_date, end_date))
+        return [path for path in paths if os.path.exists(path)]
+
+    def _partition_frame(self, path):
+        # Parsed straight into categories, without ever materializing the narratives
+        return self._read_table(
+            path, TIME_ENTRY_COLUMNS, prepare=self._compact_entries,
+            usecols=CATEGORICAL_ENTRY_COLUMNS, dtype='category'
+        )
+
+    def read_entries(self, start_date=None, end_date=None, client=None, columns=None):
+        """Read time entries in a date range, opening only the overlapping partitions
+
+        Returns compact frames (see compact_entries); narratives are only loaded if asked for.
+        """
+        columns = columns or ENTRY_FRAME_COLUMNS
+        frames = []
+        for path in self._partition_paths(start_date, end_date):
+            df = self._partition_frame(path)
+            perf.record_read(rows=len(df))
+            df = self._select_entries(
+                df, range_mask(df, start_date, end_date, client), columns, lambda: self._read_narratives(path)
+            )
+            if df is not None:
+                frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return frames[0] if len(frames) == 1 else concat_frames(frames, ignore_index=True)
+
+    def _select_entries(self, df, mask, columns, narratives):
+        """The masked rows and columns of a compact frame, or None if no row matches
+
+        narratives() returns the frame's narratives by row position; it is only called when
+        the narrative column is asked for.
+        """
+        if not mask.any():
+            return None
+        selected = [column for column in columns if column != 'narrative']
+        # Whole months inside the range are not copied
+        df = df[selected] if mask.all() else df.loc[mask, selected]
+        if 'narrative' in columns:
+            # The row index is each row's position in the partition
+            text = narratives().iloc[df.index.to_numpy()]
+            df.insert(columns.index('narrative'), 'narrative', text.set_axis(df.index))
+        return df
+
+    def iter_entries(self, start_date=None, end_date=None, client=None, chunksize=EXPORT_CHUNK_ROWS):
+        """Stream matching entries in chunks straight from the partition files, bypassing the cache"""
+        for path in self._partition_paths(start_date, end_date):
+            with open(path, 'rb') as f:
+                yield from self._iter_csv(f, start_date, end_date, client, chunksize)
+
+    def _iter_csv(self, f, start_date, end_date, client, chunksize):
+        """Stream the matching entries of one open entry CSV in chunks"""
+        try:
+            # Read as text like every other entry read, so a client "007" isn't exported as 7
+            reader = pd.read_csv(f, chunksize=chunksize, dtype=str, keep_default_na=False)
+        except pd.errors.EmptyDataError:
+            return
+        perf.record_read(bytes_read=os.fstat(f.fileno()).st_size)
+        with reader:
+            for chunk in reader:
+                perf.record_read(rows=len(chunk))
+                chunk = with_minutes(chunk.where(chunk != '', None))
+                chunk = chunk[range_mask(chunk, start_date, end_date, client)]
+                if not chunk.empty:
+                    yield chunk
+
+    def _month_partitions(self, start_date, end_date):
+        """Partition names holding entries in a date range"""
+        return [os.path.basename(path)[:-len('.csv')] for path in self._partition_paths(start_date, end_date)]
+
+    def _month_frame(self, partition, narratives=False):
+        """All entries of one partition, indexed by their row position (the second half of an entry id)"""
+        path = self._partition_path(partition)
+        df = self._partition_frame(path)
+        return df.assign(narrative=self._read_narratives(path))[ENTRY_FRAME_COLUMNS] if narratives else df
+
+    def _month_narratives(self, partition):
+        """Narratives of one partition by row position"""
+        return self._read_narratives(self._partition_path(partition))
+
+    def read_entry_page(self, start_date=None, end_date=None, client=None, offset=0, limit=50,
+                        sort_by='date', descending=False):
+        """Read one sorted page of matching entries, with entry ids and truncated narratives
+
+        Entry ids are '<partition>:<row>', stable because partitions are append-only.
+        limit=None reads every matching entry from offset on.
+        """
+        check_sort_column(sort_by)
+        frames = {}
+        for partition in self._month_partitions(start_date, end_date):
+            df = self._month_frame(partition)
+            perf.record_read(rows=len(df))
+            df = df[range_mask(df, start_date, end_date, client)]
+            if not df.empty:
+                frames[partition] = df
+        if not frames:
+            return pd.DataFrame(columns=ENTRY_PAGE_COLUMNS)
+
+        df = concat_frames(frames.values(), keys=list(frames))
+        # Stable, so ties keep file (insertion) order like SQLite's ORDER BY ..., id
+        df = df.sort_values(sort_by, ascending=not descending, kind='stable')
+        page = df.iloc[offset:None if limit is None else offset + limit]
+        # Only the page's own narratives are looked up, one partition at a time
+        partitions, rows = page.index.get_level_values(0), page.index.get_level_values(1).to_numpy()
+        text = np.empty(len(page), dtype=object)
+        for partition in partitions.unique():
+            selected = (partitions == partition)
+            text[selected] = self._month_narratives(partition).iloc[rows[selected]].to_numpy()
+        return page.assign(
+            entry_id=[f"{partition}:{row}" for partition, row in page.index],
+            narrative=preview_narratives(pd.Series(text, index=page.index))
+        ).reset_index(drop=True)[ENTRY_PAGE_COLUMNS]
+
+    def read_narrative(self, entry_id):
+        """Read the full narrative of one entry, or None if the id is unknown"""
+        partition, _, row = str(entry_id).rpartition(':')
+        if not partition or not row.isdigit() or partition not in self._month_partitions(None, None):
+            return None
+        narratives = self._month_narratives(partition)
+        row = int(row)
+        if row >= len(narratives):
+            return None
+        narrative = narratives.iloc[row]
+        return None if pd.isna(narrative) else str(narrative)
+
+    def _month_token(self, partition):
+        """Changes whenever a partition's rows are renumbered; CSV partitions only ever grow"""
+        return ''
+
+    def entry_ids_version(self):
+        """Token that changes whenever entry ids may have been renumbered; CSV entry ids never change"""
+        return None
+
+    def _month_rows(self, partition):
+        return len(self._partition_frame(self._partition_path(partition)))
+
+    def entries_since(self, marks):
+        """Yield (key, token, reset, position, entries) for entries added since marks
+
+        marks maps each partition to the (token, rows) seen last time. A partition whose
+        rows were renumbered comes back in full with reset=True. Entries carry an entry_id.
+        """
+        for partition in self._month_partitions(None, None):
+            token = self._month_token(partition)
+            seen_token, seen_rows = marks.get(partition, (token, 0))
+            if seen_token == token and self._month_rows(partition) == seen_rows:
+                continue
+            df = self._month_frame(partition, narratives=True)
+            reset = seen_token != token or len(df) < seen_rows
+            first_row = 0 if reset else seen_rows
+            df = df.iloc[first_row:]
+            yield partition, token, reset, first_row + len(df), df.assign(
+                entry_id=[f"{partition}:{row}" for row in range(first_row, first_row + len(df))]
+            )
+
+    def search_index_path(self):
+        return os.path.join(self.root, "search.db")
+
+    def append_entries(self, entries):
+        """Append time entry dicts to their monthly partitions"""
+        self.append_entry_frame(entry_frame(entries))
+
+    def append_entry_frame(self, df):
+        """Append a frame of time entries to their monthly partitions and the rollup
+
+        A precomputed minutes column (e.g. from the bulk importer) is reused rather than reparsed.
+        """
+        if df.empty:
+            return
+        df = df[ENTRY_FRAME_COLUMNS] if 'minutes' in df.columns else with_minutes(df[TIME_ENTRY_COLUMNS])
+        df = df.reset_index(drop=True)
+        partitions = partitions_for(df['date'])
+        for partition, rows in df.groupby(partitions, sort=False):
+            self._append_frame(self._partition_path(partition), rows, TIME_ENTRY_COLUMNS, prepare=self._compact_entries)
+        rollup = aggregate_rollup(df)
+        for partition, rows in rollup.groupby(partitions_for(rollup['date']), sort=False):
+            path = self._rollup_path(partition)
+            self._append_frame(path, rows, ROLLUP_COLUMNS, prepare=index_rollup, fold=fold_rollup)
+            self._fold_rollup_file(path)
+
+    def _rollup_path(self, partition):
+        return os.path.join(self.rollup_dir, f"{partition}.csv")
+
+    def _rollup_paths(self, start_date, end_date):
+        """List existing rollup month files overlapping a date range (all of them if unbounded)"""
+        if start_date is None or end_date is None:
+            return sorted(glob.glob(os.path.join(self.rollup_dir, "*.csv")))
+        paths = map(self._rollup_path, months_between(start_date, end_date))
+        return [path for path in paths if os.path.exists(path)]
+
+    def _rollup_month(self, path):
+        """One month's rollup, aggregated and indexed by key; see index_rollup"""
+        indexed = self._read_table(path, ROLLUP_COLUMNS, prepare=index_rollup, dtype={key: 'str' for key in ROLLUP_KEYS})
+        self._fold_rollup_file(path)
+        return indexed[0]
+
+    def _fold_rollup_file(self, path):
+        """Rewrite a rollup month with one row per key once appended deltas outnumber its keys"""
+        with self._lock:
+            cached = self._tables.get(path)
+            if not cached or cached[1] != self._versions.get(path, 0):
+                return
+            rollup, positions, rows_read = cached[2]
+            if rows_read <= 2 * len(rollup) + ROLLUP_FOLD_SLACK_ROWS:
+                return
+            # Skipped if anyone else appended since our cache was current; they'll fold it later
+            if self._replace_file(path, rollup[ROLLUP_COLUMNS], expected=cached[0]):
+                self._tables[path] = (file_signature(path), self._versions.get(path, 0), (rollup, positions, len(rollup)))
+                perf.log_event("storage.rollup_folded", path=path, rows=rows_read, keys=len(rollup))
+
+    def read_rollup(self, start_date=None, end_date=None, client=None):
+        """Read daily (date, client, matter) totals in a date range, one row per key in no particular order
+
+        Only the months overlapping the range are opened, and each is cached folded by key.
+        """
+        frames = []
+        for path in self._rollup_paths(start_date, end_date):
+            df = self._rollup_month(path)
+            perf.record_read(rows=len(df))
+            mask = range_mask(df, start_date, end_date, client)
+            if mask.any():
+                frames.append(df if mask.all() else df[mask])
+        if not frames:
+            return pd.DataFrame(columns=ROLLUP_COLUMNS)
+        return frames[0].copy() if len(frames) == 1 else concat_frames(frames, ignore_index=True)
+
+    def rebuild_rollup(self):
+        """Recompute the daily rollup from every time entry, one file per month"""
+        rollup = aggregate_rollup(self.read_entries(columns=ROLLUP_KEYS + ['minutes']))[ROLLUP_COLUMNS]
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        months = dict(iter(rollup.groupby(partitions_for(rollup['date']), sort=True)))
+        # Months left with no entries are emptied rather than removed, so appenders never lose a file
+        for path in self._rollup_paths(None, None):
+            months.setdefault(os.path.basename(path)[:-len('.csv')], rollup.iloc[:0])
+        for partition, rows in months.items():
+            self._replace_file(self._rollup_path(partition), rows)
+        return len(rollup)
+
+    def read_clients(self):
+        return self._read_table(self.clients_file, CLIENT_COLUMNS)
+
+    def append_clients(self, records):
+        self._append_rows(self.clients_file, CLIENT_COLUMNS, records)
+
+    def read_matters(self):
+        return self._read_table(self.matters_file, MATTER_COLUMNS)
+
+    def append_matters(self, records):
+        self._append_rows(self.matters_file, MATTER_COLUMNS, records)
+
+    def reference_version(self):
+        """Token that changes whenever clients.csv or matters.csv changes on disk"""
+        return (file_signature(self.clients_file), file_signature(self.matters_file))
+
+    def rollup_version(self):
+        """Token that changes whenever time entries (and so the daily rollup) change on disk"""
+        return tuple((path, file_signature(path)) for path in self._rollup_paths(None, None))
+
+    def read_credentials(self):
+        return self._read_table(self.credentials_file, CREDENTIAL_COLUMNS)
+
+    def append_credentials(self, records):
+        """Append login rows; a later row for the same username replaces earlier ones"""
+        self._append_rows(self.credentials_file, CREDENTIAL_COLUMNS, records)
+
+    def credentials_version(self):
+        """Token that changes whenever client_auth.csv changes on disk"""
+        return file_signature(self.credentials_file)
+
+class ParquetStorage(CsvStorage):
+    """Time entries as a log-structured store: a date-sorted Parquet snapshot per month plus CSV delta logs
+
+    New entries are appended to the month's live delta, time_entries/YYYY-MM.csv, so writes
+    stay cheap. compact() (run periodically in the background, see compaction.Compactor)
+    freezes the live delta as YYYY-MM.<generation>.delta and merges the frozen deltas into
+    time_entries/YYYY-MM.parquet, sorted by date. The snapshot records the last generation it
+    absorbed, so a crash at any point leaves every entry in exactly one place readers look:
+    the snapshot, a frozen delta newer than it, or the live delta.
+    """
+
+    def __init__(self, root="."):
+        import pyarrow.parquet as pq
+        self._pq = pq
+        # path -> (file signature, version, compact frame, absorbed generation, sorted by date)
+        self._snapshots = {}
+        super().__init__(root)
+
+    def _parquet_path(self, partition):
+        return os.path.join(self.time_entries_dir, f"{partition}.parquet")
+
+    def _parquet_paths(self, start_date, end_date):
+        if start_date is None or end_date is None:
+            return sorted(glob.glob(os.path.join(self.time_entries_dir, "*.parquet")))
+        paths = map(self._parquet_path, months_between(start_date, end_date))
+        return [path for path in paths if os.path.exists(path)]
+
+    def _delta_path(self, partition, generation):
+        return os.path.join(self.time_entries_dir, f"{partition}.{generation:06d}.delta")
+
+    def _frozen_deltas(self, partition=None):
+        """(partition, generation, path) of frozen delta logs, oldest first"""
+        frozen = []
+        for path in glob.glob(os.path.join(self.time_entries_dir, f"{partition or '*'}.*.delta")):
+            name, _, generation = os.path.basename(path)[:-len('.delta')].rpartition('.')
+            if generation.isdigit():
+                frozen.append((name, int(generation), path))
+        return sorted(frozen)
+
+    def _snapshot(self, path):
+        """(compact frame, absorbed generation, sorted by date) of a month's snapshot, reparsed only when it changed"""
+        signature = file_signature(path)
+        with self._lock:
+            version = self._versions.get(path, 0)
+            cached = self._snapshots.get(path)
+            if cached and cached[0] == signature and cached[1] == version:
+                return cached[2:]
+
+            parquet_file = self._pq.ParquetFile(path, memory_map=True)
+            table = parquet_file.read(columns=COMPACT_ENTRY_COLUMNS)
+            perf.record_read(bytes_read=table.nbytes)
+            df = self._compact_entries(table.to_pandas())
+            snapshot = (df, absorbed_generation(parquet_file.schema_arrow), df['date'].cat.codes.is_monotonic_increasing)
+            self._snapshots[path] = (signature, version) + snapshot
+            return snapshot
+
+    def _absorbed_generation(self, path):
+        """The last delta generation merged into a snapshot, or None if there is no snapshot"""
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        cached = self._snapshots.get(path)
+        if cached and cached[0] == signature:
+            return cached[3]
+        try:
+            return absorbed_generation(self._pq.read_schema(path))
+        except FileNotFoundError:
+            return None
+
+    def _month_layout(self, partition):
+        """The snapshot's signature and the files holding a month's entries, in row order"""
+        snapshot = self._parquet_path(partition)
+        absorbed = self._absorbed_generation(snapshot)
+        paths = [] if absorbed is None else [snapshot]
+        paths += [path for _, generation, path in self._frozen_deltas(partition) if generation > (absorbed or 0)]
+        if os.path.exists(self._partition_path(partition)):
+            paths.append(self._partition_path(partition))
+        return file_signature(snapshot), paths
+
+    def _consistent_read(self, partition, read):
+        """read(paths) over a month's files, retried until no compaction swapped them out meanwhile"""
+        while True:
+            layout = self._month_layout(partition)
+            try:
+                result = read(layout[1])
+            except Exception:
+                # e.g. a delta removed, or a snapshot replaced between reading its rows and narratives
+                if self._month_layout(partition) != layout:
+                    continue
+                raise
+            # Appends to the live delta don't matter; freezing, merging and removing deltas do
+            if self._month_layout(partition) == layout:
+                return result
+
+    def _part_frame(self, path):
+        """(compact frame, sorted by date) of one snapshot or delta log"""
+        if path.endswith('.parquet'):
+            df, _, date_sorted = self._snapshot(path)
+            return df, date_sorted
+        return self._partition_frame(path), False
+
+    def _load_narratives(self, path):
+        if not path.endswith('.parquet'):
+            return super()._load_narratives(path)
+        narratives = self._pq.read_table(path, columns=['narrative'], memory_map=True).column('narrative').to_pandas()
+        return as_text(narratives)
+
+    def read_entries(self, start_date=None, end_date=None, client=None, columns=None):
+        """Read each month's snapshot plus its delta logs; date-sorted snapshots are binary-searched, not masked"""
+        columns = columns or ENTRY_FRAME_COLUMNS
+
+        def read(paths):
+            frames = []
+            for path in paths:
+                df, date_sorted = self._part_frame(path)
+                perf.record_read(rows=len(df))
+                if date_sorted:
+                    df = df.iloc[slice(*date_bounds(df['date'], start_date, end_date))]
+                    mask = range_mask(df, client=client)
+                else:
+                    mask = range_mask(df, start_date, end_date, client)
+                df = self._select_entries(df, mask, columns, lambda: self._read_narratives(path))
+                if df is not None:
+                    frames.append(df)
+            return frames
+
+        frames = []
+        for partition in self._month_partitions(start_date, end_date):
+            frames.extend(self._consistent_read(partition, read))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return frames[0] if len(frames) == 1 else concat_frames(frames, ignore_index=True)
+
+    def iter_entries(self, start_date=None, end_date=None, client=None, chunksize=EXPORT_CHUNK_ROWS):
+        """Stream each month's snapshot batch by batch, then its delta logs, bypassing the cache"""
+        for partition in self._month_partitions(start_date, end_date):
+            with ExitStack() as files:
+                # Open files keep their contents even if a compaction replaces or removes them
+                opened = self._consistent_read(
+                    partition, lambda paths: [(path, files.enter_context(open(path, 'rb'))) for path in paths]
+                )
+                for path, f in opened:
+                    if not path.endswith('.parquet'):
+                        yield from self._iter_csv(f, start_date, end_date, client, chunksize)
+                        continue
+                    for batch in self._pq.ParquetFile(f).iter_batches(batch_size=chunksize, columns=ENTRY_FRAME_COLUMNS):
+                        perf.record_read(rows=batch.num_rows, bytes_read=batch.nbytes)
+                        chunk = batch.to_pandas()
+                        chunk = chunk[range_mask(chunk, start_date, end_date, client)]
+                        if not chunk.empty:
+                            yield chunk
+
+    def _month_partitions(self, start_date, end_date):
+        sealed = [os.path.basename(path)[:-len('.parquet')] for path in self._parquet_paths(start_date, end_date)]
+        frozen = [partition for partition, _, _ in self._frozen_deltas()]
+        if start_date is not None and end_date is not None:
+            frozen = set(frozen) & set(months_between(start_date, end_date))
+        return sorted(set(sealed) | set(frozen) | set(super()._month_partitions(start_date, end_date)))
+
+    def _month_token(self, partition):
+        signature = file_signature(self._parquet_path(partition))
+        return f"{signature[0]}-{signature[1]}" if signature else ''
+
+    def _compaction_lock_path(self):
+        return os.path.join(self.time_entries_dir, ".compaction.lock")
+
+    def entry_ids_version(self):
+        """Token that changes whenever a compaction renumbered some month's entries"""
+        return file_signature(self._compaction_lock_path())
+
+    def _month_rows(self, partition):
+        return self._consistent_read(partition, lambda paths: sum(len(self._part_frame(path)[0]) for path in paths))
+
+    def _month_frame(self, partition, narratives=False):
+        """A month's snapshot rows followed by its delta logs' rows; compaction renumbers them"""
+        columns = ENTRY_FRAME_COLUMNS if narratives else COMPACT_ENTRY_COLUMNS
+
+        def read(paths):
+            frames = []
+            for path in paths:
+                df = self._part_frame(path)[0]
+                if narratives:
+                    df = df.assign(narrative=self._read_narratives(path))[ENTRY_FRAME_COLUMNS]
+                frames.append(df)
+            return [df for df in frames if not df.empty]
+
+        frames = self._consistent_read(partition, read)
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return frames[0] if len(frames) == 1 else concat_frames(frames, ignore_index=True)
+
+    def _month_narratives(self, partition):
+        """Snapshot narratives followed by the delta logs' narratives"""
+        frames = self._consistent_read(partition, lambda paths: [self._read_narratives(path) for path in paths])
+        frames = [narratives for narratives in frames if not narratives.empty]
+        if not frames:
+            return pd.Series(dtype='str')
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def _forget(self, path):
+        with self._lock:
+            self._tables.pop(path, None)
+            self._narratives.pop(path, None)
+            self._versions.pop(path, None)
+            self.version += 1
+
+    def compact(self, min_delta_bytes=0, idle_seconds=None, blocking=True):
+        """Merge delta logs into their months' date-sorted snapshots and return the entries merged
+
+        A month is compacted when its live delta has reached min_delta_bytes or has not been
+        written to for idle_seconds, and whenever frozen deltas are waiting (e.g. after a crash).
+        One compaction runs at a time across processes; with blocking=False this returns None
+        right away if another is running.
+        """
+        start = time.perf_counter()
+        with open(self._compaction_lock_path(), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return None
+
+            waiting = {partition for partition, _, _ in self._frozen_deltas()}
+            now = time.time()
+            months = []
+            for partition in self._month_partitions(None, None):
+                try:
+                    stat = os.stat(self._partition_path(partition))
+                except FileNotFoundError:
+                    stat = None
+                due = stat is not None and stat.st_size > 0 and (
+                    stat.st_size >= min_delta_bytes
+                    or (idle_seconds is not None and now - stat.st_mtime >= idle_seconds)
+                )
+                if due or partition in waiting:
+                    months.append(partition)
+            merged = sum(self._compact_partition(partition) for partition in months)
+            if months:
+                # Entry ids were renumbered; see entry_ids_version
+                os.utime(lock_file.fileno())
+
+        if months:
+            perf.log_event(
+                "storage.compacted", months=len(months), entries=merged,
+                seconds=round(time.perf_counter() - start, 3)
+            )
+        return merged
+
+    def _compact_partition(self, partition):
+        """Freeze a month's live delta, then merge every frozen delta into a new snapshot"""
+        import pyarrow as pa
+
+        snapshot = self._parquet_path(partition)
+        absorbed = self._absorbed_generation(snapshot) or 0
+        frozen = []
+        for _, generation, path in self._frozen_deltas(partition):
+            if generation > absorbed:
+                frozen.append((generation, path))
+            else:
+                # Left behind by a compaction that stopped after swapping its snapshot in
+                os.remove(path)
+                self._forget(path)
+
+        live = self._partition_path(partition)
+        if os.path.exists(live):
+            # Held just long enough to rename; appenders waiting on the lock retry on a fresh live delta
+            with self._lock, self._open_for_append(live) as f:
+                if os.fstat(f.fileno()).st_size > 0:
+                    generation = max([absorbed] + [generation for generation, _ in frozen]) + 1
+                    path = self._delta_path(partition, generation)
+                    os.rename(live, path)
+                    frozen.append((generation, path))
+                    # Same file under a new name, so its cached rows carry over
+                    for cache in (self._tables, self._narratives):
+                        cached = cache.pop(live, None)
+                        if cached and cached[1] == self._versions.get(live, 0):
+                            cache[path] = (cached[0], self._versions.get(path, 0), cached[2])
+                    self.invalidate(live)
+        if not frozen:
+            return 0
+
+        schema = pa.schema([(column, pa.string()) for column in TIME_ENTRY_COLUMNS] + [('minutes', pa.int64())])
+        tables, merged = [], 0
+        if os.path.exists(snapshot):
+            tables.append(self._pq.read_table(snapshot, schema=schema))
+        for _, path in frozen:
+            try:
+                delta = with_minutes(pd.read_csv(path, dtype=str, keep_default_na=False))
+            except pd.errors.EmptyDataError:
+                continue
+            delta = delta[ENTRY_FRAME_COLUMNS].astype(object)
+            delta = delta.where(delta.notna() & (delta != ''), None)
+            tables.append(pa.Table.from_pandas(delta, schema=schema, preserve_index=False))
+            merged += len(delta)
+        # Stable, so entries of a day keep the order they were written in
+        table = pa.concat_tables(tables) if tables else schema.empty_table()
+        table = table.sort_by('date')
+        table = table.replace_schema_metadata({ABSORBED_GENERATION_KEY: str(frozen[-1][0])})
+
+        staging_path = f"{snapshot}.tmp"
+        with open(staging_path, 'wb') as f:
+            self._pq.write_table(table, f, compression='zstd')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging_path, snapshot)
+        # The new snapshot must be durable before the deltas it absorbed are removed
+        fsync_directory(self.time_entries_dir)
+        for _, path in frozen:
+            os.remove(path)
+            self._forget(path)
+        self.invalidate(snapshot)
+        return merged
+
+    def convert_partitions(self):
+        """Fold every CSV delta into its month's Parquet snapshot now"""
+        return self.compact()
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS time_entries (
+    id INTEGER PRIMARY KEY,
+    date TEXT,
+    client TEXT,
+    matter TEXT,
+    duration TEXT,
+    minutes INTEGER NOT NULL DEFAULT 0,
+    narrative TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_time_entries_date ON time_entries (date);
+CREATE INDEX IF NOT EXISTS idx_time_entries_client_date ON time_entries (client, date);
+CREATE INDEX IF NOT EXISTS idx_time_entries_client_matter ON time_entries (client, matter);
+
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    date TEXT NOT NULL,
+    client TEXT NOT NULL,
+    matter TEXT NOT NULL,
+    minutes INTEGER NOT NULL,
+    entries INTEGER NOT NULL,
+    PRIMARY KEY (date, client, matter)
+);
+
+CREATE TABLE IF NOT EXISTS clients (
+    client_name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS matters (
+    client_name TEXT NOT NULL,
+    matter_name TEXT NOT NULL,
+    PRIMARY KEY (client_name, matter_name)
+);
+CREATE TABLE IF NOT EXISTS client_auth (
+    username TEXT PRIMARY KEY,
+    client_name TEXT,
+    password_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class SqliteStorage:
+    """All tables in one SQLite database in WAL mode, with indexed entry lookups"""
+
+    def __init__(self, path="time_tracker.db"):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+            self._add_minutes_column(conn)
+        if not self._has_rows("daily_rollup") and self._has_rows("time_entries"):
+            self.rebuild_rollup()
+
+    def _has_rows(self, table):
+        return self._connection().execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is not None
+
+    def _add_minutes_column(self, conn):
+        """Upgrade databases created before durations were stored as minutes"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(time_entries)")]
+        if 'minutes' in columns:
+            return
+        conn.execute("ALTER TABLE time_entries ADD COLUMN minutes INTEGER NOT NULL DEFAULT 0")
+        conn.execute("""
+            UPDATE time_entries
+            SET minutes = CAST(substr(duration, 1, instr(duration, ':') - 1) AS INTEGER) * 60
+                        + CAST(substr(duration, instr(duration, ':') + 1) AS INTEGER)
+            WHERE instr(duration, ':') > 0
+        """)
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL syncs the WAL on every commit; the write queue batches commits to keep that cheap
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def _counter(self, key):
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    @property
+    def version(self):
+        """Write counter shared by every process using this database"""
+        return self._counter('version')
+
+    def reference_version(self):
+        """Counter bumped by every client or matter write"""
+        return self._counter('reference')
+
+    def rollup_version(self):
+        """Counter bumped by every time entry write"""
+        return self._counter('rollup')
+
+    @contextmanager
+    def _transaction(self, counters=('version',)):
+        """Run writes in one transaction that also bumps the given meta counters"""
+        with self._connection() as conn:
+            yield conn
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET value = value + 1",
+                [(key,) for key in counters]
+            )
+
+    def _write(self, sql, records, columns, counters=('version',)):
+        """Insert records in one transaction"""
+        rows = [tuple(record.get(column) for column in columns) for record in records]
+        if not rows:
+            return
+        with self._transaction(counters) as conn:
+            conn.executemany(sql, rows)
+
+    def _query(self, sql, params=()):
+        df = pd.read_sql_query(sql, self._connection(), params=params)
+        # The indexes mean SQLite visits roughly the rows it returns
+        perf.record_read(rows=len(df))
+        return df
+
+    def _range_clause(self, start_date=None, end_date=None, client=None):
+        """Build a WHERE clause and parameters for a date range and client filter"""
+        clauses, params = [], []
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(start_date.strftime('%Y-%m-%d'))
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(end_date.strftime('%Y-%m-%d'))
+        if client is not None:
+            clauses.append("client = ?")
+            params.append(client)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def read_entries(self, start_date=None, end_date=None, client=None, columns=None):
+        """Read time entries in a date range using the date/client indexes"""
+        where, params = self._range_clause(start_date, end_date, client)
+        selected = ', '.join(columns or ENTRY_FRAME_COLUMNS)
+        return self._query(f"SELECT {selected} FROM time_entries{where} ORDER BY id", params)
+
+    def iter_entries(self, start_date=None, end_date=None, client=None, chunksize=EXPORT_CHUNK_ROWS):
+        """Stream matching entries in chunks from a server-side cursor"""
+        where, params = self._range_clause(start_date, end_date, client)
+        for chunk in pd.read_sql_query(
+            f"SELECT {', '.join(ENTRY_FRAME_COLUMNS)} FROM time_entries{where} ORDER BY id",
+            self._connection(), params=params, chunksize=chunksize
+        ):
+            perf.record_read(rows=len(chunk))
+            yield chunk
+
+    def read_entry_page(self, start_date=None, end_date=None, client=None, offset=0, limit=50,
+                        sort_by='date', descending=False):
+        """Read one sorted page of matching entries with LIMIT/OFFSET, truncating narratives in SQL (limit=None for all)"""
+        check_sort_column(sort_by)
+        where, params = self._range_clause(start_date, end_date, client)
+        return self._query(
+            "SELECT CAST(id AS TEXT) AS entry_id, date, client, matter, duration, "
+            f"CASE WHEN length(narrative) > {NARRATIVE_PREVIEW_CHARS} "
+            f"THEN substr(narrative, 1, {NARRATIVE_PREVIEW_CHARS - 1}) || '…' "
+            "ELSE COALESCE(narrative, '') END AS narrative, minutes "
+            f"FROM time_entries{where} ORDER BY {sort_by} {'DESC' if descending else 'ASC'}, id LIMIT ? OFFSET ?",
+            # A negative LIMIT means no limit
+            params + [-1 if limit is None else limit, offset]
+        )
+
+    def entry_ids_version(self):
+        """Entry ids are row ids and never change"""
+        return None
+
+    def read_narrative(self, entry_id):
+        """Read the full narrative of one entry, or None if the id is unknown"""
+        if not str(entry_id).isdigit():
+            return None
+        row = self._connection().execute(
+            "SELECT narrative FROM time_entries WHERE id = ?", (int(entry_id),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def entries_since(self, marks):
+        """Yield entries with ids above the last one seen, in chunks; see CsvStorage.entries_since"""
+        _, last_id = marks.get('sqlite', ('', 0))
+        for chunk in pd.read_sql_query(
+            "SELECT id, date, client, matter, duration, narrative FROM time_entries WHERE id > ? ORDER BY id",
+            self._connection(), params=(last_id,), chunksize=EXPORT_CHUNK_ROWS
+        ):
+            if not chunk.empty:
+                yield 'sqlite', '', False, int(chunk['id'].iloc[-1]), chunk.assign(entry_id=chunk['id'].astype(str))
+
+    def search_index_path(self):
+        return f"{os.path.splitext(self.path)[0]}.search.db"
+
+    def append_entries(self, entries):
+        """Insert time entry dicts; see append_entry_frame"""
+        self.append_entry_frame(entry_frame(entries))
+
+    def append_entry_frame(self, df):
+        """Insert a frame of time entries and fold them into the daily rollup in one transaction"""
+        if df.empty:
+            return
+        df = df[ENTRY_FRAME_COLUMNS] if 'minutes' in df.columns else with_minutes(df[TIME_ENTRY_COLUMNS])
+        rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        rollup = aggregate_rollup(df)
+        rollup[ROLLUP_KEYS] = rollup[ROLLUP_KEYS].astype(object).fillna('')
+        rollup_rows = rollup[ROLLUP_COLUMNS].astype(object).itertuples(index=False, name=None)
+        with self._transaction(counters=('version', 'rollup')) as conn:
+            conn.executemany(
+                "INSERT INTO time_entries (date, client, matter, duration, narrative, minutes) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany(
+                "INSERT INTO daily_rollup (date, client, matter, minutes, entries) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (date, client, matter) DO UPDATE SET "
+                "minutes = minutes + excluded.minutes, entries = entries + excluded.entries",
+                rollup_rows
+            )
+
+    def read_rollup(self, start_date=None, end_date=None, client=None):
+        """Read daily (date, client, matter) totals in a date range"""
+        where, params = self._range_clause(start_date, end_date, client)
+        return self._query(
+            "SELECT date, NULLIF(client, '') AS client, NULLIF(matter, '') AS matter, minutes, entries "
+            f"FROM daily_rollup{where} ORDER BY date",
+            params
+        )
+
+    def rebuild_rollup(self):
+        """Recompute the daily rollup from every time entry"""
+        with self._transaction(counters=('version', 'rollup')) as conn:
+            conn.execute("DELETE FROM daily_rollup")
+            conn.execute("""
+                INSERT INTO daily_rollup (date, client, matter, minutes, entries)
+                SELECT COALESCE(date, ''), COALESCE(client, ''), COALESCE(matter, ''), SUM(minutes), COUNT(*)
+                FROM time_entries
+                GROUP BY 1, 2, 3
+            """)
+            return conn.execute("SELECT COUNT(*) FROM daily_rollup").fetchone()[0]
+
+    def read_clients(self):
+        return self._query("SELECT client_name FROM clients ORDER BY rowid")
+
+    def append_clients(self, records):
+        self._write(
+            "INSERT OR IGNORE INTO clients (client_name) VALUES (?)",
+            records, CLIENT_COLUMNS, counters=('version', 'reference')
+        )
+
+    def read_matters(self):
+        return self._query("SELECT client_name, matter_name FROM matters ORDER BY rowid")
+
+    def append_matters(self, records):
+        self._write(
+            "INSERT OR IGNORE INTO matters (client_name, matter_name) VALUES (?, ?)",
+            records, MATTER_COLUMNS, counters=('version', 'reference')
+        )
+
+    def read_credentials(self):
+        return self._query("SELECT client_name, username, password_hash FROM client_auth ORDER BY rowid")
+
+    def append_credentials(self, records):
+        """Insert or replace login rows, keyed by username"""
+        self._write(
+            "INSERT INTO client_auth (client_name, username, password_hash) VALUES (?, ?, ?) "
+            "ON CONFLICT (username) DO UPDATE SET "
+            "client_name = excluded.client_name, password_hash = excluded.password_hash",
+            records, CREDENTIAL_COLUMNS, counters=('version', 'credentials')
+        )
+
+    def credentials_version(self):
+        """Counter bumped by every login write"""
+        return self._counter('credentials')
+
+def migrate_csv_to_sqlite(db_path="time_tracker.db", root="."):
+    """Import every CSV table (entries, clients, matters, credentials) into SQLite"""
+    source = CsvStorage(root)
+    target = SqliteStorage(db_path)
+    if target._has_rows("time_entries"):
+        raise ValueError(f"{db_path} already contains time entries")
+
+    counts = {}
+    for name, read, append in [
+        ('clients', source.read_clients, target.append_clients),
+        ('matters', source.read_matters, target.append_matters),
+        ('client_auth', source.read_credentials, target.append_credentials),
+        ('time_entries', source.read_entries, target.append_entries),
+    ]:
+        df = read()
+        records = df.astype(object).where(df.notna(), None).to_dict('records')
+        append(records)
+        counts[name] = len(records)
+    return counts
@@ -2,6 +2,10 @@ import streamlit as st
 
 def initialize_session_state():
     """Initialize session state variables"""
+    if st.session_state.get('session_initialized'):
+        return
+    st.session_state.session_initialized = True
+
     if 'timer_running' not in st.session_state:
         st.session_state.timer_running = False
 
@@ -12,4 +16,15 @@ def initialize_session_state():
         st.session_state.elapsed_time = None
 
     if 'last_update' not in st.session_state:
-        st.session_state.last_update = None
\ No newline at end of file
+        st.session_state.last_update = None
+
+    # Client portal mode
+    if 'client_portal' not in st.session_state:
+        st.session_state.client_portal = False
+
+    if 'client_logged_in' not in st.session_state:
+        st.session_state.client_logged_in = False
+
+def summarize_hours(entries):
+    """Total hours for a frame of time entries or rollup rows; grouped totals go through reports.aggregate"""
+    return entries['minutes'].sum() / 60
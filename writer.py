@@ -0,0 +1,108 @@
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+
+import perf
+
+# Upper bound on rows folded into one commit
+WRITE_BATCH_ROWS = 5_000
+WRITE_TIMEOUT_SECONDS = 60
+
+_STOP = object()
+
+class WriteQueue:
+    """Single background writer that group-commits writes from every session in this process
+
+    Callers submit client, matter or time entry records and block on a Future that resolves
+    once the batch holding them is on disk. Whatever queued up while the previous batch was
+    committing goes into the next one, so a lone writer pays no extra latency and a burst
+    of writers shares one append (and one fsync) per file.
+
+    on_commit(records, before, after) is called after each batch with its records by kind
+    and the storage's rollup_version() from before and after the write.
+    """
+
+    def __init__(self, storage, on_commit=None, max_batch_rows=WRITE_BATCH_ROWS):
+        self.storage = storage
+        self.on_commit = on_commit
+        self.max_batch_rows = max_batch_rows
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="time-tracker-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, kind, records):
+        """Queue 'clients', 'matters' or 'entries' records; the Future resolves to the row count"""
+        future = Future()
+        self._queue.put((kind, list(records), future))
+        return future
+
+    def write(self, kind, records, timeout=WRITE_TIMEOUT_SECONDS):
+        """Queue records and wait until they are durably written"""
+        return self.submit(kind, records).result(timeout)
+
+    def close(self):
+        """Commit everything already queued and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch, rows, stop = [item], len(item[1]), False
+            # Group commit: take everything that arrived while the last batch was being written
+            while rows < self.max_batch_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                rows += len(item[1])
+            self._commit(batch)
+            if stop:
+                return
+
+    def _apply(self, items):
+        """Write a group of queued items with one storage call per kind"""
+        records = {'clients': [], 'matters': [], 'entries': []}
+        for kind, kind_records, _ in items:
+            records[kind].extend(kind_records)
+        # Reference data first, so entries never land before the client they belong to
+        if records['clients']:
+            self.storage.append_clients(records['clients'])
+        if records['matters']:
+            self.storage.append_matters(records['matters'])
+        if records['entries']:
+            self.storage.append_entries(records['entries'])
+        return records
+
+    def _commit(self, batch):
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            before = self.storage.rollup_version()
+            records = self._apply(batch)
+            after = self.storage.rollup_version()
+        except Exception as e:
+            # Not retried: part of the batch may already be on disk and appends are not idempotent
+            for _, _, future in batch:
+                future.set_exception(e)
+            perf.log_event("writer.failed", writes=len(batch), error=str(e))
+            return
+        perf.log_event("writer.committed", writes=len(batch), rows=sum(len(item[1]) for item in batch))
+        # Before acknowledging, so callers read their own writes from caches and the search index
+        if self.on_commit:
+            try:
+                self.on_commit(records, before, after)
+            except Exception as e:
+                perf.log_event("writer.on_commit_failed", error=str(e))
+        for _, item_records, future in batch:
+            future.set_result(len(item_records))